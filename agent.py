@@ -1,24 +1,131 @@
+import os
 import json
-from typing import Optional
-from groq import Groq
+import asyncio
+import inspect
+import threading
+import time
+import uuid
+from typing import Iterable, Iterator, Optional
 from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
 from rich.syntax import Syntax
+from client import get_client, prewarm
+from completion_cache import CompletionCache
 from config import ConfigManager
-from tools import CodingTools
+from history import CHARS_PER_TOKEN, ConversationHistory, estimate_tokens
+from python_kernel import get_kernel_pool
+from shell import close_shell_session
+from spool import close_spool
+from tools import CodingTools, ToolExecutor
+from renderer import StreamRenderer
+from router import get_router, prefetch
+from scheduler import get_scheduler, is_retryable
+from sessions import SessionLog, find_session, list_sessions
+from tracing import get_tracer
 
 console = Console()
 
+# Stands in for the rest of an answer or tool output cut off by Ctrl-C
+CANCELLED_NOTE = "[Cancelled by the user]"
+# Seconds Ctrl-C waits for a cancelled turn to stop its tools
+CANCEL_TIMEOUT = 10.0
 
-class CodingAgent:
-    """AI Coding Agent using Groq API"""
+# Log bytes replayed on resume, in multiples of the context budget; the
+# rest would only be folded into the history summary
+RESUME_WINDOW = 4
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Shared event loop, run in a daemon thread, for the sync wrappers"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="agent-loop", daemon=True
+            ).start()
+    return _loop
+
+
+class TurnCancelled(Exception):
+    """Raised by the sync wrapper when Ctrl-C cancelled a turn"""
+
+
+def _with_tool_answers(messages: Iterable[dict]) -> Iterator[dict]:
+    """Logged messages, answering tool calls the log has no result for
+
+    A session that crashed, or was killed by a second Ctrl-C, between a
+    step's tool calls and their results would otherwise be rejected by the
+    API on every later request.
+    """
+    pending: list[dict] = []
+
+    def answers() -> Iterator[dict]:
+        for tool_call in pending:
+            yield {
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "name": tool_call["function"]["name"],
+                "content": json.dumps({"success": False, "error": CANCELLED_NOTE}),
+            }
+        pending.clear()
+
+    for message in messages:
+        if message["role"] == "tool":
+            pending[:] = [c for c in pending if c["id"] != message.get("tool_call_id")]
+        else:
+            yield from answers()
+        yield message
+        if message["role"] == "assistant":
+            pending.extend(message.get("tool_calls") or [])
+    yield from answers()
 
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
+
+class AsyncCodingAgent:
+    """Asyncio-native AI Coding Agent using the async Groq client"""
+
+    def __init__(
+        self,
+        api_key: str,
+        max_tool_workers: int = 4,
+        max_steps: int = 10,
+        context_budget: int = 24000,
+        cache_mode: Optional[str] = None,
+        base_url: Optional[str] = None,
+        render_mode: str = "plain",
+        routing: bool = True,
+        race: Optional[bool] = None,
+    ):
+        self.client = get_client(api_key, base_url)
+        self.cache = CompletionCache(
+            cache_mode or os.getenv("GROQ_AGENT_CACHE", "off")
+        )
         self.model = "mixtral-8x7b-32768"
-        self.conversation_history = []
+        self.conversation_history = ConversationHistory(token_budget=context_budget)
         self.tools = CodingTools.get_tool_definitions()
+        self.prompt_tokens = estimate_tokens(
+            self.get_system_prompt() + json.dumps(self.tools)
+        )
+        # Tools of this agent get their own Python interpreter, shell and spool
+        self.tool_session = uuid.uuid4().hex[:12]
+        self.tool_executor = ToolExecutor(
+            max_workers=max_tool_workers, session=self.tool_session
+        )
+        self.max_steps = max_steps
         self.max_retries = 5
+        self.render_mode = render_mode
+        # Without a router every step uses self.model
+        self.router = get_router() if routing else None
+        self.race = bool(self.router and (self.router.race if race is None else race))
+        # Message of the exception that failed the last turn, if any
+        self.last_error: Optional[str] = None
+        # Log every message is appended to; off until a session is started
+        self.session: Optional[SessionLog] = None
 
     def add_message(self, role: str, content: str):
         """Add message to conversation history"""
@@ -39,131 +146,525 @@ Always explain your actions and provide clear, helpful responses. Use tools when
 When suggesting code, provide complete working examples.
 Be safety-conscious and warn users about potentially dangerous operations."""
 
-    def process_tool_call(self, tool_name: str, tool_input: dict) -> str:
+    async def process_tool_call(self, tool_name: str, tool_input: dict) -> str:
         """Process a tool call and return result"""
         console.print(f"\n[cyan]→ Using tool: {tool_name}[/cyan]")
-        result = CodingTools.execute_tool(tool_name, tool_input)
-        return result
+        results = await self.tool_executor.arun([(tool_name, tool_input)])
+        return results[0]
 
-    def stream_response(self, user_input: str) -> bool:
-        """Stream response from Groq API with tool support"""
-        self.add_message("user", user_input)
+    async def process_tool_calls(
+        self, calls: list[tuple[str, dict]], results: Optional[list] = None
+    ) -> list[str]:
+        """Process several tool calls concurrently, results in call order"""
+        for tool_name, _ in calls:
+            console.print(f"\n[cyan]→ Using tool: {tool_name}[/cyan]")
+        return await self.tool_executor.arun(calls, results)
 
+    def route(self) -> list[str]:
+        """Models to try for the next completion, best first"""
+        if self.router is None:
+            return [self.model]
+        prompt_chars, tools = 0, False
+        for message in reversed(self.conversation_history):
+            if message["role"] == "tool":
+                tools = True
+            elif message["role"] == "user":
+                prompt_chars = len(message.get("content") or "")
+                break
+        return self.router.route(
+            self.model, prompt_chars, self.conversation_history.total_tokens, tools
+        )
+
+    def build_request(self) -> dict:
+        """Parameters of the next streaming completion request"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.get_system_prompt()},
+                *self.conversation_history,
+            ],
+            "tools": self.tools,
+            "max_tokens": 8192,
+            "temperature": 0.7,
+            "stream": True,
+        }
+
+    async def stream_completion(
+        self, renderer: Optional[StreamRenderer] = None
+    ) -> tuple[str, list[dict]]:
+        """Stream one completion, returning its text and tool calls"""
+        tracer = get_tracer()
+        with tracer.span("history") as span:
+            compacted = self.conversation_history.compact(
+                reserved_tokens=self.prompt_tokens
+            )
+            request = self.build_request()
+            models = self.route()
+            span.set("messages", len(request["messages"]))
+            span.set("compacted", compacted)
+        if compacted:
+            console.print("[yellow]→ Compacted older conversation history[/yellow]")
+
+        if renderer is None:
+            renderer = StreamRenderer(console, self.render_mode)
+        renderer.start()
         try:
-            # Check if this is a tool-requiring request
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.get_system_prompt()},
-                    *self.conversation_history,
-                ],
-                tools=self.tools,
-                max_tokens=8192,
-                temperature=0.7,
-                stream=True,
+            with tracer.span("completion", model=models[0]) as span:
+                tool_calls = await self._complete_routed(request, models, renderer, span)
+        finally:
+            full_response = renderer.finish()
+        return full_response, tool_calls
+
+    async def _complete_routed(
+        self, request: dict, models: list[str], renderer: StreamRenderer, span
+    ) -> list[dict]:
+        """Complete with the first of models that works, racing if enabled"""
+        if self.race and len(models) > 1:
+            try:
+                return await self._race(request, models[:2], renderer, span)
+            except Exception as e:
+                renderer.flush()
+                console.print(
+                    f"\n[yellow]→ Race failed ({type(e).__name__}); "
+                    f"trying models in turn[/yellow]"
+                )
+        for index, model in enumerate(models):
+            last = index == len(models) - 1
+            span.set("model", model)
+            try:
+                return await self._complete_with_retries(
+                    {**request, "model": model},
+                    renderer,
+                    span,
+                    max_retries=None if last else self.router.retries_before_fallback,
+                    first_token_timeout=None if last else self.router.first_token_timeout,
+                )
+            except Exception as e:
+                if last:
+                    raise
+                span.set("fallbacks", index + 1)
+                renderer.flush()
+                console.print(
+                    f"\n[yellow]→ {model}: {type(e).__name__}; "
+                    f"falling back to {models[index + 1]}[/yellow]"
+                )
+        return []
+
+    async def _open(self, params: dict, timeout: Optional[float] = None):
+        """Start a completion stream and read it up to its first token"""
+
+        async def open_stream():
+            response = await self.cache.create(self.client, **params)
+            get_scheduler().observe(
+                getattr(getattr(response, "response", None), "headers", None)
             )
+            return await prefetch(response)
+
+        if timeout is None:
+            return await open_stream()
+        return await asyncio.wait_for(open_stream(), timeout)
+
+    async def _race(
+        self, request: dict, models: list[str], renderer: StreamRenderer, span
+    ) -> list[dict]:
+        """Stream from several models at once, keeping the first to produce a token"""
+        scheduler = get_scheduler()
+        reserved = self.prompt_tokens + self.conversation_history.total_tokens
+
+        async def start(model: str):
+            await scheduler.acquire(reserved)
+            started = time.perf_counter()
+            try:
+                stream = await self._open({**request, "model": model})
+            except BaseException:
+                scheduler.release()
+                raise
+            return model, started, stream
+
+        tasks = {asyncio.ensure_future(start(model)): model for model in models}
+        pending = set(tasks)
+        winner = None
+        error = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        self.router.failed(tasks[task])
+                    elif winner is None:
+                        winner = task.result()
+        except BaseException:
+            # Cancelled while waiting; nobody will consume the winner either
+            winner = None
+            raise
+        finally:
+            # Cancelling a start closes its stream and frees its slot; starts
+            # that got a stream but lost are closed here
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for task in tasks:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                if task.result() is not winner:
+                    await task.result()[2].close()
+                    scheduler.release()
+        if winner is None:
+            raise error
+
+        model, started, stream = winner
+        span.set("model", model)
+        span.set("race_winner", model)
+        try:
+            tool_calls, used = await self._consume(stream, renderer, span, started)
+        except Exception:
+            self.router.failed(model)
+            raise
+        finally:
+            scheduler.release()
+        scheduler.succeeded()
+        scheduler.record_usage(reserved, used)
+        self.router.succeeded(
+            model, stream.first_token - started if stream.first_token else None
+        )
+        return tool_calls
 
-            full_response = ""
-            current_tool_call = None
-            tool_calls = []
+    async def _complete_with_retries(
+        self,
+        request: dict,
+        renderer: StreamRenderer,
+        span,
+        max_retries: Optional[int] = None,
+        first_token_timeout: Optional[float] = None,
+    ) -> list[dict]:
+        """Run a completion through the rate-limit scheduler, retrying failures
 
-            for chunk in response:
+        A stream that breaks off is resumed: the text shown so far is sent
+        back as a partial assistant message for the model to continue.
+        first_token_timeout fails the attempt, without retries, when the
+        model is slow to start, so the caller can fall back to another.
+        """
+        scheduler = get_scheduler()
+        if max_retries is None:
+            max_retries = self.max_retries
+        reserved = self.prompt_tokens + self.conversation_history.total_tokens
+        for attempt in range(max_retries + 1):
+            shown = "".join(renderer.chunks)
+            params = request
+            if shown:
+                params = {
+                    **request,
+                    "messages": [
+                        *request["messages"],
+                        {"role": "assistant", "content": shown},
+                    ],
+                }
+            await scheduler.acquire(reserved)
+            try:
+                started = time.perf_counter()
+                response = await self._open(params, first_token_timeout)
+                tool_calls, used = await self._consume(
+                    response, renderer, span, started, echo=shown
+                )
+            except Exception as e:
+                if attempt == max_retries or not is_retryable(e):
+                    if self.router is not None:
+                        self.router.failed(request["model"])
+                    raise
+                error = e
+            else:
+                scheduler.succeeded()
+                scheduler.record_usage(reserved, used)
+                if self.router is not None:
+                    self.router.succeeded(
+                        request["model"],
+                        response.first_token - started if response.first_token else None,
+                    )
+                return tool_calls
+            finally:
+                scheduler.release()
+
+            span.set("retries", attempt + 1)
+            renderer.flush()
+            console.print(
+                f"\n[yellow]→ {type(error).__name__}; retrying "
+                f"({attempt + 1}/{max_retries})[/yellow]"
+            )
+            await scheduler.backoff(attempt, error)
+        return []
+
+    async def _consume(
+        self, response, renderer: StreamRenderer, span, started: float, echo: str = ""
+    ) -> tuple[list[dict], int]:
+        """Render a completion stream as it arrives and collect its tool calls
+
+        echo is text already shown by an earlier attempt. The start of the
+        stream is held back until it either repeats all of echo, which is
+        then dropped, or departs from it, so a continuation that merely
+        begins like the shown text is kept. Returns the tool calls and the
+        prompt plus completion tokens reported by the server.
+        """
+        tool_calls: dict[int, dict] = {}
+        first_token = None
+        render = 0.0
+        used = 0
+        # Start of the stream while it could still be a repeat of echo
+        held = ""
+
+        try:
+            async for chunk in response:
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None):
+                    used = x_groq.usage.total_tokens or 0
+                    if span.recording:
+                        span.set("prompt_tokens", x_groq.usage.prompt_tokens)
+                        span.set("completion_tokens", x_groq.usage.completion_tokens)
+                if not chunk.choices:
+                    continue
                 delta = chunk.choices[0].delta
+                if first_token is None and (delta.content or delta.tool_calls):
+                    first_token = time.perf_counter()
 
                 # Handle content streaming
-                if delta.content:
-                    console.print(delta.content, end="", highlight=False)
-                    full_response += delta.content
-
-                # Handle tool use
-                if hasattr(delta, "tool_calls") and delta.tool_calls:
-                    for tool_call in delta.tool_calls:
-                        if hasattr(tool_call, "id") and tool_call.id:
-                            current_tool_call = {
-                                "id": tool_call.id,
-                                "function": {"name": "", "arguments": ""},
-                            }
-                            tool_calls.append(current_tool_call)
-
-                        if hasattr(tool_call, "function"):
-                            if hasattr(tool_call.function, "name"):
-                                current_tool_call["function"]["name"] = (
-                                    tool_call.function.name
-                                )
-                            if hasattr(tool_call.function, "arguments"):
-                                current_tool_call["function"]["arguments"] += (
-                                    tool_call.function.arguments
-                                )
-
-            console.print()  # New line after streaming
-
-            # Process tool calls if any
-            if tool_calls:
-                self.add_message("assistant", full_response)
+                text = delta.content
+                if text and echo:
+                    held += text
+                    if len(held) < len(echo) and echo.startswith(held):
+                        continue
+                    text = held[len(echo) :] if held.startswith(echo) else held
+                    echo = held = ""
+                if text:
+                    before = time.perf_counter()
+                    renderer.feed(text)
+                    render += time.perf_counter() - before
+
+                # Handle tool use; fragments of one call share an index
+                for tool_call in getattr(delta, "tool_calls", None) or []:
+                    current = tool_calls.setdefault(
+                        tool_call.index,
+                        {
+                            "id": "",
+                            "type": "function",
+                            "function": {"name": "", "arguments": ""},
+                        },
+                    )
+                    if tool_call.id:
+                        current["id"] = tool_call.id
+                    if tool_call.function:
+                        if tool_call.function.name:
+                            current["function"]["name"] = tool_call.function.name
+                        if tool_call.function.arguments:
+                            current["function"]["arguments"] += (
+                                tool_call.function.arguments
+                            )
+            if held:
+                # The stream ended inside the prefix; it was a short continuation
+                renderer.feed(held)
+        finally:
+            # Closing releases the connection early when the task is cancelled
+            await response.close()
+
+        if span.recording:
+            if first_token is not None:
+                span.set("ttft_ms", round((first_token - started) * 1000, 3))
+            span.set("chunks", len(renderer.chunks))
+            span.set("tool_calls", len(tool_calls))
+            span.set("render_ms", round(render * 1000, 3))
+        return [tool_calls[index] for index in sorted(tool_calls)], used
+
+    async def prewarm(self) -> bool:
+        """Connect to the API ahead of the next request"""
+        return await prewarm(self.client)
 
+    def close(self):
+        """Release the agent's interpreter, shell, spool and session log"""
+        self.tool_executor.shutdown()
+        get_kernel_pool().close(self.tool_session)
+        close_shell_session(self.tool_session)
+        close_spool(self.tool_session)
+        if self.session is not None:
+            self.session.close()
+
+    async def stream_response(self, user_input: str) -> bool:
+        """Stream response from Groq API, running tools until the model is done"""
+        with get_tracer().span("turn", input_chars=len(user_input)) as span:
+            ok = await self._run_turn(user_input, span)
+            span.set("ok", ok)
+            return ok
+
+    async def _run_turn(self, user_input: str, span) -> bool:
+        self.last_error = None
+        self.add_message("user", user_input)
+        # What is in flight, for leaving history valid if the turn is cancelled
+        renderer = None
+        tool_calls: list[dict] = []
+        tool_results: list = []
+
+        try:
+            for step in range(self.max_steps):
+                span.set("steps", step + 1)
+                if step:
+                    console.print("\n[yellow]→ Processing tool results...[/yellow]\n")
+
+                renderer = StreamRenderer(console, self.render_mode)
+                full_response, tool_calls = await self.stream_completion(renderer)
+                renderer = None
+
+                if not tool_calls:
+                    self.add_message("assistant", full_response)
+                    return True
+
+                self.conversation_history.append(
+                    {
+                        "role": "assistant",
+                        "content": full_response,
+                        "tool_calls": tool_calls,
+                    }
+                )
+
+                calls = []
                 for tool_call in tool_calls:
                     tool_name = tool_call["function"]["name"]
                     try:
                         tool_input = json.loads(
-                            tool_call["function"]["arguments"]
+                            tool_call["function"]["arguments"] or "{}"
                         )
                     except json.JSONDecodeError:
                         tool_input = {}
+                    calls.append((tool_name, tool_input))
 
-                    # Execute tool
-                    tool_result = self.process_tool_call(tool_name, tool_input)
+                # Execute all tools of this step, then answer them in one request
+                tool_results = [None] * len(calls)
+                await self.process_tool_calls(calls, tool_results)
+                self._answer_tool_calls(tool_calls, tool_results)
 
-                    # Add tool result to history
-                    self.add_message(
-                        "user",
-                        f'Tool "{tool_name}" returned: {tool_result}',
-                    )
-
-                    # Get follow-up response
-                    console.print("\n[yellow]→ Processing tool result...[/yellow]\n")
-                    follow_up = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": self.get_system_prompt()},
-                            *self.conversation_history,
-                        ],
-                        tools=self.tools,
-                        max_tokens=8192,
-                        temperature=0.7,
-                        stream=True,
-                    )
-
-                    followup_response = ""
-                    for chunk in follow_up:
-                        if chunk.choices[0].delta.content:
-                            console.print(
-                                chunk.choices[0].delta.content, end="", highlight=False
-                            )
-                            followup_response += chunk.choices[0].delta.content
+            console.print(
+                f"[yellow]→ Stopped after {self.max_steps} tool steps[/yellow]"
+            )
+            return True
 
-                    console.print()  # New line after streaming
-                    self.add_message("assistant", followup_response)
+        except asyncio.CancelledError:
+            span.set("cancelled", True)
+            if renderer is not None:
+                partial = "".join(renderer.chunks)
+                self.add_message(
+                    "assistant", f"{partial}\n\n{CANCELLED_NOTE}" if partial else CANCELLED_NOTE
+                )
             else:
-                # No tool calls, just add the response
-                self.add_message("assistant", full_response)
-
-            return True
+                # Every tool call needs an answer or the next request is rejected
+                self._answer_tool_calls(tool_calls, tool_results)
+            raise
 
         except Exception as e:
+            self.last_error = str(e)
             console.print(f"[red]✗ Error: {e}[/red]")
             return False
 
+    def _answer_tool_calls(self, tool_calls: list[dict], tool_results: list):
+        """Add the tool messages of a step; calls without a result were cancelled"""
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            if tool_result is None:
+                tool_result = json.dumps({"success": False, "error": CANCELLED_NOTE})
+            self.conversation_history.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "content": tool_result,
+                }
+            )
+
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.conversation_history.clear()
         console.print("[yellow]→ Conversation history cleared[/yellow]")
+        if self.session is not None:
+            # The old session stays on disk and can be resumed
+            self.start_session()
+            console.print(f"[yellow]→ New session {self.session.session_id}[/yellow]")
+
+    def start_session(self, session_id: Optional[str] = None) -> str:
+        """Log the conversation from here on to a new session"""
+        if self.session is not None:
+            self.session.close()
+        self.session = SessionLog(session_id)
+        self.conversation_history.log = self.session
+        return self.session.session_id
+
+    def resume_session(self, ref: str) -> dict:
+        """Replace history with a logged session and keep appending to it
+
+        Only the end of the log that can still fit in the context budget
+        is replayed; older turns stay on disk.
+        """
+        session_id = find_session(ref)
+        if session_id is None:
+            return {"success": False, "error": f"No single session matches '{ref}'"}
+        started = time.perf_counter()
+        log = SessionLog(session_id)
+        window = self.conversation_history.token_budget * CHARS_PER_TOKEN * RESUME_WINDOW
+        self.conversation_history.clear()
+        self.conversation_history.log = None
+        loaded = self.conversation_history.extend(
+            _with_tool_answers(log.read(max_bytes=window))
+        )
+        self.conversation_history.compact(reserved_tokens=self.prompt_tokens)
+        if self.session is not None:
+            self.session.close()
+        self.session = log
+        log.messages = log.count()
+        self.conversation_history.log = log
+        return {
+            "success": True,
+            "session_id": session_id,
+            "messages": log.messages,
+            "loaded": loaded,
+            "load_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def save_session(self, name: Optional[str] = None):
+        """Sync the session log to disk, optionally under a new name"""
+        if self.session is None:
+            self.start_session()
+        result = self.session.save(name)
+        if result["success"]:
+            console.print(
+                f"[green]✓ Session {result['session_id']} saved "
+                f"({self.session.messages} messages)[/green]\n"
+                f"Resume with: [cyan]python main.py chat --resume "
+                f"{result['session_id']}[/cyan]"
+            )
+        else:
+            console.print(f"[red]✗ {result['error']}[/red]")
+
+    def show_sessions(self):
+        """Display recent sessions"""
+        sessions = list_sessions()
+        if not sessions:
+            console.print("[yellow]No saved sessions yet[/yellow]")
+            return
+        current = self.session.session_id if self.session else None
+        for session in sessions:
+            marker = "[green]*[/green]" if session["id"] == current else " "
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated"]))
+            console.print(
+                f"{marker} [cyan]{session['id']}[/cyan] {updated} "
+                f"{session['messages']} msgs  {escape(session['preview'])}",
+                highlight=False,
+            )
 
     def show_commands(self):
         """Display available commands"""
         commands = [
-            ("/clear", "Clear conversation history"),
+            ("/clear", "Clear conversation history and start a new session"),
+            ("/save [NAME]", "Sync the session to disk, optionally renaming it"),
+            ("/sessions", "List recent sessions"),
             ("/exit", "Exit the agent"),
             ("/history", "Show conversation history"),
+            ("/context", "Show context window usage"),
             ("/help", "Show this help message"),
         ]
         panel = Panel(
@@ -173,6 +674,27 @@ Be safety-conscious and warn users about potentially dangerous operations."""
         )
         console.print(panel)
 
+    def show_context(self):
+        """Display context window usage"""
+        usage = self.conversation_history.usage()
+        used = self.prompt_tokens + usage["tokens"]
+        percent = used / usage["budget"] * 100 if usage["budget"] else 0
+        console.print(
+            f"[cyan]Context:[/cyan] ~{used:,} / {usage['budget']:,} tokens "
+            f"({percent:.0f}%)\n"
+            f"  System prompt + tools: ~{self.prompt_tokens:,}\n"
+            f"  History: ~{usage['tokens']:,} in {usage['messages']} messages "
+            f"(tool outputs ~{usage['tool_tokens']:,})\n"
+            f"  Compactions: {usage['compactions']}"
+        )
+        if self.router is not None:
+            for model, count in sorted(self.router.completions.items()):
+                ttft = self.router.ttft.get(model)
+                console.print(
+                    f"  {model}: {count} completions"
+                    + (f", first token ~{ttft * 1000:.0f} ms" if ttft is not None else "")
+                )
+
     def show_history(self):
         """Display conversation history"""
         if not self.conversation_history:
@@ -180,6 +702,75 @@ Be safety-conscious and warn users about potentially dangerous operations."""
             return
 
         for i, msg in enumerate(self.conversation_history, 1):
-            role = "[cyan]User[/cyan]" if msg["role"] == "user" else "[green]Agent[/green]"
-            preview = msg["content"][:100].replace("\n", " ")
+            if msg["role"] == "user":
+                role = "[cyan]User[/cyan]"
+            elif msg["role"] == "tool":
+                role = f"[magenta]Tool {msg.get('name', '')}[/magenta]"
+            else:
+                role = "[green]Agent[/green]"
+            content = msg.get("content") or ""
+            if not content and msg.get("tool_calls"):
+                content = "→ " + ", ".join(
+                    call["function"]["name"] for call in msg["tool_calls"]
+                )
+            preview = content[:100].replace("\n", " ")
             console.print(f"{i}. {role}: {preview}...")
+
+
+class CodingAgent:
+    """AI Coding Agent using Groq API
+
+    Thin synchronous wrapper around AsyncCodingAgent. Coroutines run on a
+    shared background event loop; everything else is delegated as-is.
+    """
+
+    def __init__(self, api_key: str, **kwargs):
+        self._loop = get_event_loop()
+        self._agent = self._run(self._create(api_key, **kwargs))
+
+    @staticmethod
+    async def _create(api_key: str, **kwargs) -> AsyncCodingAgent:
+        """Build the async agent on the loop it will run on"""
+        return AsyncCodingAgent(api_key, **kwargs)
+
+    def _run(self, coro):
+        """Run a coroutine on the agent loop and wait for its result
+
+        Ctrl-C cancels the coroutine and waits for it to clean up (close
+        the stream, kill tool processes, fix up history), then raises
+        TurnCancelled. A second Ctrl-C stops waiting.
+        """
+        finished = threading.Event()
+
+        async def run():
+            try:
+                return await coro
+            finally:
+                finished.set()
+
+        future = asyncio.run_coroutine_threadsafe(run(), self._loop)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            finished.wait(CANCEL_TIMEOUT)
+            raise TurnCancelled() from None
+        except BaseException:
+            future.cancel()
+            raise
+
+    def prewarm(self):
+        """Start connecting to the API in the background, without waiting"""
+        return asyncio.run_coroutine_threadsafe(self._agent.prewarm(), self._loop)
+
+    def __getattr__(self, name):
+        attr = getattr(self._agent, name)
+        if inspect.iscoroutinefunction(attr):
+            return lambda *args, **kwargs: self._run(attr(*args, **kwargs))
+        return attr
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            setattr(self._agent, name, value)
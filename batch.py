@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Iterator, Optional
+from rich.console import Console
+
+console = Console()
+
+
+def read_prompts(path: str) -> Iterator[tuple[str, str]]:
+    """(id, prompt) pairs of a JSONL file, read lazily
+
+    A line is a JSON string or an object with "prompt", or "title" and
+    "body" as in a request backlog. Its id is "id" or "request_id", or
+    the line number.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                console.print(f"[yellow]Skipping line {number}: not JSON[/yellow]")
+                continue
+            if isinstance(item, str):
+                yield str(number), item
+                continue
+            item_id = str(item.get("id") or item.get("request_id") or number)
+            prompt = item.get("prompt") or "\n\n".join(
+                str(item[key]) for key in ("title", "body") if item.get(key)
+            )
+            if not prompt:
+                console.print(f"[yellow]Skipping line {number}: no prompt[/yellow]")
+                continue
+            yield item_id, prompt
+
+
+def finished_ids(path: str, retry_failed: bool = False) -> set[str]:
+    """Ids already in an output file, so an interrupted run can resume"""
+    done = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # Cut off by the interruption
+                if result.get("ok") or not retry_failed:
+                    done.add(str(result["id"]))
+    except OSError:
+        pass
+    return done
+
+
+class BatchRunner:
+    """Runs independent prompts in concurrent agent sessions"""
+
+    def __init__(self, api_key: str, concurrency: int = 4, **agent_kwargs):
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.agent_kwargs = agent_kwargs
+        self.latencies: list[float] = []
+        self.errors: Counter = Counter()
+        self.completed = 0
+        self.failed = 0
+        # Items already in the output file
+        self.skipped = 0
+
+    async def run_one(self, item_id: str, prompt: str) -> dict[str, Any]:
+        """One prompt in a fresh session"""
+        from agent import AsyncCodingAgent
+
+        agent = AsyncCodingAgent(self.api_key, **self.agent_kwargs)
+        started = time.perf_counter()
+        try:
+            ok = await agent.stream_response(prompt)
+        finally:
+            agent.close()
+        messages = list(agent.conversation_history)
+        last = messages[-1] if messages else {}
+        return {
+            "id": item_id,
+            "ok": ok,
+            "response": last.get("content") if last.get("role") == "assistant" else None,
+            "error": agent.last_error,
+            "tool_calls": [
+                call["function"]["name"]
+                for message in messages
+                for call in message.get("tool_calls") or []
+            ],
+            "duration_s": round(time.perf_counter() - started, 3),
+        }
+
+    async def run(
+        self,
+        items: Iterator[tuple[str, str]],
+        out,
+        done: Optional[set[str]] = None,
+    ):
+        """Process items with bounded concurrency, appending results to out
+
+        Items are pulled from the iterator through a small queue as workers
+        free up, so a prompt file is never held in memory at once. Items
+        whose id is in done are skipped.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def feed():
+            for item_id, prompt in items:
+                if done and item_id in done:
+                    self.skipped += 1
+                    continue
+                await queue.put((item_id, prompt))
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def worker():
+            while (item := await queue.get()) is not None:
+                item_id, prompt = item
+                result = await self.run_one(item_id, prompt)
+                # Written as each prompt finishes; a crash loses at most
+                # the prompts still in flight
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                self.latencies.append(result["duration_s"])
+                if result["ok"]:
+                    self.completed += 1
+                    mark = "[green]✓[/green]"
+                else:
+                    self.failed += 1
+                    self.errors[result["error"] or "unknown error"] += 1
+                    mark = "[red]✗[/red]"
+                console.print(
+                    f"{mark} [{self.completed + self.failed}] "
+                    f"{item_id} ({result['duration_s']:.1f}s)",
+                    highlight=False,
+                )
+
+        await asyncio.gather(feed(), *(worker() for _ in range(self.concurrency)))
+
+    def print_stats(self, elapsed: float):
+        from bench import percentile
+
+        done = self.completed + self.failed
+        console.print(
+            f"\n[bold]Batch:[/bold] {self.completed} ok, {self.failed} failed, "
+            f"{self.skipped} already done, {elapsed:.1f}s"
+        )
+        if done:
+            console.print(
+                f"  Throughput: {done / elapsed * 60:.1f} prompts/min\n"
+                f"  Latency: p50 {percentile(self.latencies, 50):.1f}s, "
+                f"p95 {percentile(self.latencies, 95):.1f}s, "
+                f"max {max(self.latencies):.1f}s"
+            )
+        for error, count in self.errors.most_common(5):
+            console.print(f"  [red]{count}× {error[:120]}[/red]")
+
+
+def _end_last_line(path: str):
+    """Terminate a partial last line left by an interrupted write"""
+    try:
+        with open(path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+
+def run_batch(
+    input_path: str,
+    out_path: str,
+    api_key: str,
+    concurrency: int = 4,
+    retry_failed: bool = False,
+    **agent_kwargs,
+) -> int:
+    """Run a prompt file, resuming from out_path; returns the failure count"""
+    from agent import console as agent_console
+    from tools import console as tools_console
+
+    # Interleaved output of concurrent sessions would be unreadable
+    agent_console.quiet = tools_console.quiet = True
+
+    done = finished_ids(out_path, retry_failed)
+    console.print(
+        f"[cyan]→ Running {input_path}, {concurrency} at a time"
+        f"{f', skipping {len(done)} already in {out_path}' if done else ''}[/cyan]"
+    )
+
+    runner = BatchRunner(api_key, concurrency, **agent_kwargs)
+    started = time.perf_counter()
+    _end_last_line(out_path)
+    with open(out_path, "a", encoding="utf-8") as out:
+        try:
+            asyncio.run(runner.run(read_prompts(input_path), out, done))
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Interrupted; rerun the same command to resume[/yellow]")
+        finally:
+            runner.print_stats(time.perf_counter() - started)
+    return runner.failed
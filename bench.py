@@ -0,0 +1,288 @@
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+SCENARIO_DIR = Path(__file__).parent / "scenarios"
+RESULTS_VERSION = 1
+# Metrics where a bigger number is an improvement
+HIGHER_IS_BETTER = {"tokens_per_sec"}
+# Relative change in p50 or p95 reported as a regression
+REGRESSION_THRESHOLD = 0.10
+# Timing changes smaller than this are noise, whatever their relative size
+REGRESSION_MIN_SECONDS = 0.001
+
+
+def percentile(values: list[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """Count, mean, min, max and p50/p95/p99 of a sample"""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "min": min(values, default=0.0),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values, default=0.0),
+    }
+
+
+class Recorder:
+    """Raw samples of one scenario, keyed by metric name"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def add(self, metric: str, value: float):
+        self.samples.setdefault(metric, []).append(value)
+
+    def tool(self, tool_name: str, seconds: float):
+        self.add(f"tool:{tool_name}", seconds)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {metric: summarize(values) for metric, values in sorted(self.samples.items())}
+
+
+class TimedStream:
+    """Pass-through completion stream that records token timings"""
+
+    def __init__(self, stream, started: float, recorder: Recorder):
+        self._stream = stream
+        self._started = started
+        self._recorder = recorder
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        first = last = None
+        tokens = 0
+        usage_tokens = None
+        async for chunk in self._stream:
+            now = time.perf_counter()
+            delta = chunk.choices[0].delta if chunk.choices else None
+            if delta is not None and (delta.content or delta.tool_calls):
+                if first is None:
+                    first = now
+                    self._recorder.add("ttft", now - self._started)
+                elif delta.content:
+                    self._recorder.add("inter_token", now - last)
+                tokens += 1
+                last = now
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None):
+                usage_tokens = x_groq.usage.completion_tokens
+            yield chunk
+        self._recorder.add("request_total", time.perf_counter() - self._started)
+        tokens = usage_tokens or tokens
+        if first is not None and last > first:
+            self._recorder.add("tokens_per_sec", tokens / (last - first))
+
+    async def close(self):
+        await self._stream.close()
+
+
+class TimedCache:
+    """Wraps an agent's completion cache to time every request"""
+
+    def __init__(self, cache, recorder: Recorder):
+        self._cache = cache
+        self._recorder = recorder
+
+    async def create(self, client, **params):
+        started = time.perf_counter()
+        stream = await self._cache.create(client, **params)
+        return TimedStream(stream, started, self._recorder)
+
+
+def load_scenario(path: str) -> dict[str, Any]:
+    """Read a scenario file, filling in defaults"""
+    with open(path, "r", encoding="utf-8") as f:
+        scenario = json.load(f)
+    if not scenario.get("prompts"):
+        raise ValueError(f"Scenario has no prompts: {path}")
+    scenario.setdefault("name", Path(path).stem)
+    scenario.setdefault("repeat", 1)
+    scenario.setdefault("agent", {})
+    scenario.setdefault("server", {})
+    return scenario
+
+
+def instrument(agent, recorder: Recorder):
+    """Attach the recorder to an agent's request, history and tool paths"""
+    agent.cache = TimedCache(agent.cache, recorder)
+    agent.tool_executor.on_timing = recorder.tool
+    build_request = agent.build_request
+
+    def timed_build_request() -> dict:
+        started = time.perf_counter()
+        params = build_request()
+        # The client JSON-encodes the messages on every request
+        json.dumps(params["messages"])
+        recorder.add("history_serialization", time.perf_counter() - started)
+        return params
+
+    agent.build_request = timed_build_request
+
+
+async def run_scenario(
+    scenario: dict[str, Any],
+    api_key: str,
+    base_url: Optional[str] = None,
+    repeat: Optional[int] = None,
+) -> dict[str, Any]:
+    """Run every prompt of a scenario, each repeat in a fresh agent"""
+    from agent import AsyncCodingAgent
+
+    recorder = Recorder()
+    turns = errors = 0
+    for _ in range(repeat or scenario["repeat"]):
+        agent = AsyncCodingAgent(
+            api_key,
+            max_tool_workers=scenario["agent"].get("tool_workers", 4),
+            max_steps=scenario["agent"].get("max_steps", 10),
+            cache_mode="off",
+            base_url=base_url,
+            # Routing would send short prompts to another model than the
+            # scenario's; scenarios opt in with "routing": true
+            routing=scenario["agent"].get("routing", False),
+        )
+        if scenario["agent"].get("model"):
+            agent.model = scenario["agent"]["model"]
+        instrument(agent, recorder)
+        for prompt in scenario["prompts"]:
+            started = time.perf_counter()
+            ok = await agent.stream_response(prompt)
+            recorder.add("turn", time.perf_counter() - started)
+            turns += 1
+            errors += not ok
+        agent.close()
+    return {"turns": turns, "errors": errors, "metrics": recorder.summary()}
+
+
+def run_benchmarks(
+    paths: list[str],
+    api_key: str,
+    base_url: Optional[str] = None,
+    local: bool = False,
+    repeat: Optional[int] = None,
+    quiet: bool = True,
+) -> dict[str, Any]:
+    """Run scenario files and collect their results"""
+    from agent import console as agent_console
+    from tools import console as tools_console
+
+    # Streamed text and tool output would bury the report
+    agent_console.quiet = tools_console.quiet = quiet
+    results: dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": "local" if local else base_url or "groq",
+        "scenarios": {},
+    }
+    for path in paths:
+        scenario = load_scenario(path)
+        server = None
+        url = base_url
+        if local:
+            from local_server import ServerConfig, start_server
+
+            server = start_server(ServerConfig(**scenario["server"]))
+            url = server.url
+        console.print(f"[cyan]→ Running scenario: {scenario['name']}[/cyan]")
+        try:
+            results["scenarios"][scenario["name"]] = asyncio.run(
+                run_scenario(scenario, api_key, url, repeat)
+            )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+    return results
+
+
+def _format(metric: str, value: float) -> str:
+    if metric in HIGHER_IS_BETTER:
+        return f"{value:.1f}"
+    if value < 0.001:
+        return f"{value * 1e6:.0f}µs"
+    return f"{value * 1000:.1f}ms"
+
+
+def _change(metric: str, value: float, base: float) -> str:
+    """Relative change versus the baseline, coloured by whether it is better"""
+    if not base:
+        return "-"
+    change = (value - base) / base
+    worse = -change if metric in HIGHER_IS_BETTER else change
+    color = "red" if worse > REGRESSION_THRESHOLD else "green" if worse < -REGRESSION_THRESHOLD else "white"
+    return f"[{color}]{change:+.0%}[/{color}]"
+
+
+def regressions(results: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Metrics whose p50 or p95 got worse than the baseline by the threshold"""
+    found = []
+    for name, scenario in results["scenarios"].items():
+        base_metrics = baseline.get("scenarios", {}).get(name, {}).get("metrics", {})
+        for metric, stats in scenario["metrics"].items():
+            base = base_metrics.get(metric)
+            if not base:
+                continue
+            for key in ("p50", "p95"):
+                if not base[key]:
+                    continue
+                if (
+                    metric not in HIGHER_IS_BETTER
+                    and abs(stats[key] - base[key]) < REGRESSION_MIN_SECONDS
+                ):
+                    continue
+                change = (stats[key] - base[key]) / base[key]
+                if metric in HIGHER_IS_BETTER:
+                    change = -change
+                if change > REGRESSION_THRESHOLD:
+                    found.append(f"{name} {metric} {key} {change:+.0%}")
+    return found
+
+
+def print_report(results: dict[str, Any], baseline: Optional[dict[str, Any]] = None):
+    """Print one table per scenario, with baseline deltas when given"""
+    for name, scenario in results["scenarios"].items():
+        table = Table(
+            title=f"{name}: {scenario['turns']} turns, {scenario['errors']} errors",
+            title_justify="left",
+        )
+        table.add_column("Metric", style="cyan")
+        for column in ("n", "p50", "p95", "p99", "max"):
+            table.add_column(column, justify="right")
+        base_metrics = (baseline or {}).get("scenarios", {}).get(name, {}).get("metrics", {})
+        if baseline is not None:
+            table.add_column("Δp50", justify="right")
+            table.add_column("Δp95", justify="right")
+        for metric, stats in scenario["metrics"].items():
+            row = [metric, str(stats["count"])] + [
+                _format(metric, stats[key]) for key in ("p50", "p95", "p99", "max")
+            ]
+            if baseline is not None:
+                base = base_metrics.get(metric)
+                row += [
+                    _change(metric, stats[key], base[key]) if base else "-"
+                    for key in ("p50", "p95")
+                ]
+            table.add_row(*row)
+        console.print(table)
@@ -0,0 +1,69 @@
+import asyncio
+import importlib.util
+import weakref
+from typing import Optional
+
+# Idle connections are kept this long so the next turn skips TCP/TLS setup
+KEEPALIVE_SECONDS = 300.0
+# Connect quickly or fail over to a retry; streams may run long
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 600.0
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+# Connection pool behind each client handed out
+_pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _http_client():
+    """Connection pool for one API endpoint, with HTTP/2 when h2 is installed"""
+    import httpx
+    from groq import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+
+
+def get_client(api_key: str, base_url: Optional[str] = None):
+    """AsyncGroq client shared by every agent on the running event loop
+
+    Clients for the same endpoint share one connection pool. Pools are
+    per event loop because connections cannot move between loops.
+    """
+    from groq import AsyncGroq
+
+    cache = _clients.setdefault(asyncio.get_running_loop(), {})
+    http = cache.get(base_url)
+    if http is None:
+        http = cache[base_url] = _http_client()
+    key = (api_key, base_url)
+    client = cache.get(key)
+    if client is None:
+        # base_url=None falls back to GROQ_BASE_URL, then the Groq API.
+        # Retries are left to the shared scheduler, which sees every session
+        client = cache[key] = AsyncGroq(
+            api_key=api_key, base_url=base_url, max_retries=0, http_client=http
+        )
+        _pools[client] = http
+    return client
+
+
+async def prewarm(client) -> bool:
+    """Open a pooled connection to the client's endpoint ahead of a request"""
+    http = _pools.get(client)
+    if http is None:
+        return False
+    try:
+        # Any response will do; it leaves a warm connection in the pool
+        await http.head(str(client.base_url), timeout=CONNECT_TIMEOUT)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+from groq.types.chat import ChatCompletionChunk
+from config import CONFIG_DIR
+
+CACHE_DIR = CONFIG_DIR / "cache"
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+# off: always call the API; cache: read-through; record: always call the
+# API and overwrite; replay: never call the API, a miss is an error
+CACHE_MODES = ("off", "cache", "record", "replay")
+
+
+class CacheMiss(Exception):
+    """A replay-mode request that was never recorded"""
+
+
+class ReplayStream:
+    """Async stream of recorded chunks, shaped like the client's stream"""
+
+    def __init__(self, chunks: list[dict]):
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for data in self._chunks:
+            yield ChatCompletionChunk.model_validate(data)
+            # Yield control like a network stream would
+            await asyncio.sleep(0)
+
+    async def close(self):
+        pass
+
+
+class RecordingStream:
+    """Pass-through stream that hands the chunks to a callback once complete"""
+
+    def __init__(self, stream, on_complete: Callable[[list[dict]], None]):
+        self._stream = stream
+        self._on_complete = on_complete
+        self.response = getattr(stream, "response", None)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        chunks = []
+        async for chunk in self._stream:
+            chunks.append(chunk.model_dump(mode="json", exclude_none=True))
+            yield chunk
+        # Only complete streams are stored; an abandoned one never gets here
+        self._on_complete(chunks)
+
+    async def close(self):
+        await self._stream.close()
+
+
+class CompletionCache:
+    """Content-addressed store of streamed completions with LRU eviction
+
+    Keys hash the model, messages, tools and temperature. Entries are the
+    streamed chunks as JSON lines, so a replay streams exactly like the
+    recorded response did.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        directory: Path = CACHE_DIR,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.mode = mode
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._used_bytes: Optional[int] = None
+
+    @staticmethod
+    def key(params: dict[str, Any]) -> str:
+        """Cache key for a request"""
+        material = {
+            name: params.get(name)
+            for name in ("model", "messages", "tools", "temperature")
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.jsonl"
+
+    def load(self, key: str) -> Optional[list[dict]]:
+        """Recorded chunks for key, marking the entry recently used"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                chunks = [json.loads(line) for line in f if line.strip()]
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return chunks
+
+    def save(self, key: str, chunks: list[dict]):
+        """Store chunks atomically, then evict if over the size budget"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix(f".tmp{os.getpid()}")
+        with open(temp, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk, separators=(",", ":")) + "\n")
+        size = temp.stat().st_size
+        os.replace(temp, path)
+        if self._used_bytes is None:
+            self._used_bytes = self._scan()[1]
+        else:
+            self._used_bytes += size
+        if self._used_bytes > self.max_bytes:
+            self.evict()
+
+    def _scan(self) -> tuple[list[tuple[float, int, Path]], int]:
+        entries = []
+        for path in self.directory.glob("*/*.jsonl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def evict(self):
+        """Delete least recently used entries down to 90% of the budget"""
+        entries, used = self._scan()
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if used <= target:
+                break
+            try:
+                path.unlink()
+                used -= size
+            except OSError:
+                pass
+        self._used_bytes = used
+
+    async def create(self, client, **params):
+        """Stream a chat completion through the cache"""
+        if self.mode == "off":
+            return await client.chat.completions.create(**params)
+        key = self.key(params)
+        if self.mode in ("cache", "replay"):
+            chunks = self.load(key)
+            if chunks is not None:
+                self.hits += 1
+                return ReplayStream(chunks)
+            self.misses += 1
+            if self.mode == "replay":
+                raise CacheMiss(f"No recorded response for request {key[:12]}")
+        stream = await client.chat.completions.create(**params)
+        return RecordingStream(stream, lambda chunks: self.save(key, chunks))
@@ -1,25 +1,93 @@
 import os
 import json
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
-import keyring
 from rich.console import Console
-from rich.prompt import Prompt
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
 
 console = Console()
 
 CONFIG_DIR = Path.home() / ".groq_agent"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+CREDENTIAL_CACHE_FILE = CONFIG_DIR / "credentials.cache"
 SERVICE_NAME = "groq-cli-agent"
+# Seconds a keyring lookup may be reused from disk by later processes;
+# 0 (the default) keeps the key out of the filesystem entirely
+CREDENTIAL_TTL = float(os.getenv("GROQ_AGENT_CREDENTIAL_TTL", "0"))
+
+
+@contextmanager
+def locked(path: Path):
+    """Hold an exclusive lock on path's companion .lock file
+
+    Uses flock, or msvcrt.locking on Windows; where neither exists the
+    lock is skipped and writes stay atomic but may lose a concurrent update.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a+") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            # Locks the first byte; retries for ~10s before raising OSError
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path: Path, data: str, mode: int = 0o644):
+    """Replace path with data so readers see the old or new file, never half"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp, mode)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
 
 
 class ConfigManager:
-    """Manages API keys and configuration"""
+    """Manages API keys and configuration
+
+    The config file is re-read only when its mtime or size changes and
+    written atomically under a file lock. The API key is looked up once
+    per process; with GROQ_AGENT_CREDENTIAL_TTL set, a keyring result is
+    also shared with later processes for that many seconds.
+    """
 
     def __init__(self):
         self.config_dir = CONFIG_DIR
         self.config_file = CONFIG_FILE
-        self.ensure_config_dir()
+        self._config: dict = {}
+        self._config_stamp: Optional[tuple[int, int]] = None
+        self._api_key: Optional[str] = None
+        self._lock = threading.Lock()
 
     @staticmethod
     def ensure_config_dir():
@@ -31,20 +99,65 @@ class ConfigManager:
         # Check environment variable first
         if api_key := os.getenv("GROQ_API_KEY"):
             return api_key
-
-        # Check keyring
+        if self._api_key:
+            return self._api_key
+        with self._lock:
+            if not self._api_key:
+                self._api_key = self._cached_credential() or self._keyring_api_key()
+        return self._api_key
+
+    def _keyring_api_key(self) -> Optional[str]:
+        # Importing keyring picks a backend, which can be slow
         try:
+            import keyring
+
             if api_key := keyring.get_password(SERVICE_NAME, "api_key"):
+                self._cache_credential(api_key)
                 return api_key
         except Exception as e:
             console.print(f"[yellow]Keyring error: {e}[/yellow]")
 
         return None
 
+    def _cached_credential(self) -> Optional[str]:
+        if CREDENTIAL_TTL <= 0:
+            return None
+        try:
+            with open(CREDENTIAL_CACHE_FILE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached["expires"] > time.time():
+                return cached["api_key"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _cache_credential(self, api_key: str):
+        if CREDENTIAL_TTL <= 0:
+            return
+        try:
+            atomic_write(
+                CREDENTIAL_CACHE_FILE,
+                json.dumps({"api_key": api_key, "expires": time.time() + CREDENTIAL_TTL}),
+                mode=0o600,
+            )
+        except OSError:
+            pass
+
+    def clear_credential_cache(self):
+        """Forget the API key looked up so far, in memory and on disk"""
+        self._api_key = None
+        try:
+            CREDENTIAL_CACHE_FILE.unlink()
+        except OSError:
+            pass
+
     def set_api_key(self, api_key: str) -> bool:
         """Store API key securely in keyring"""
         try:
+            import keyring
+
             keyring.set_password(SERVICE_NAME, "api_key", api_key)
+            self.clear_credential_cache()
             console.print("[green]✓ API key saved securely[/green]")
             return True
         except Exception as e:
@@ -54,25 +167,51 @@ class ConfigManager:
     def save_config(self, config_data: dict) -> bool:
         """Save configuration to JSON file"""
         try:
-            with open(self.config_file, "w") as f:
-                json.dump(config_data, f, indent=2)
+            with locked(self.config_file):
+                self._write(config_data)
             return True
         except Exception as e:
             console.print(f"[red]✗ Failed to save config: {e}[/red]")
             return False
 
+    def update_config(self, **changes) -> bool:
+        """Merge changes into the saved configuration as one locked step"""
+        try:
+            with locked(self.config_file):
+                self._config_stamp = None
+                self._write({**self.load_config(), **changes})
+            return True
+        except Exception as e:
+            console.print(f"[red]✗ Failed to save config: {e}[/red]")
+            return False
+
+    def _write(self, config_data: dict):
+        atomic_write(self.config_file, json.dumps(config_data, indent=2))
+        stat = self.config_file.stat()
+        self._config = dict(config_data)
+        self._config_stamp = (stat.st_mtime_ns, stat.st_size)
+
     def load_config(self) -> dict:
         """Load configuration from JSON file"""
-        if self.config_file.exists():
+        try:
+            stat = self.config_file.stat()
+        except OSError:
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._config_stamp:
             try:
                 with open(self.config_file, "r") as f:
-                    return json.load(f)
+                    self._config = json.load(f)
+                self._config_stamp = stamp
             except Exception as e:
                 console.print(f"[yellow]Warning: Failed to load config: {e}[/yellow]")
-        return {}
+                return {}
+        return dict(self._config)
 
     def setup_api_key(self) -> bool:
         """Interactive API key setup"""
+        from rich.prompt import Prompt
+
         console.print("\n[bold cyan]🔐 API Key Setup[/bold cyan]")
         console.print("Get your API key from: [blue]https://console.groq.com[/blue]\n")
 
@@ -83,13 +222,21 @@ class ConfigManager:
             return False
 
         if self.set_api_key(api_key):
-            config = self.load_config()
-            config["api_key_set"] = True
-            self.save_config(config)
-            return True
+            return self.update_config(api_key_set=True)
 
         return False
 
     def check_api_key(self) -> bool:
         """Check if API key is configured"""
         return bool(self.get_api_key())
+
+
+_manager: Optional[ConfigManager] = None
+
+
+def get_config_manager() -> ConfigManager:
+    """Config manager of the current process"""
+    global _manager
+    if _manager is None:
+        _manager = ConfigManager()
+    return _manager
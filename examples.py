@@ -8,8 +8,10 @@ This file shows how to:
 3. Handle responses
 """
 
+from typing import Any
 from agent import CodingAgent
-from config import ConfigManager
+from config import get_config_manager
+from tool_registry import get_registry, tool
 from tools import CodingTools
 import json
 
@@ -22,7 +24,7 @@ def example_basic_usage():
     """Example: Basic programmatic usage of the agent"""
     print("\n=== Example 1: Basic Usage ===")
 
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     api_key = config_manager.get_api_key()
 
     if not api_key:
@@ -46,7 +48,7 @@ def example_conversation_context():
     """Example: Using conversation history for context"""
     print("\n=== Example 2: Conversation Context ===")
 
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     api_key = config_manager.get_api_key()
 
     if not api_key:
@@ -73,27 +75,31 @@ def example_conversation_context():
 # ============================================================================
 
 class ExtendedTools(CodingTools):
-    """Example: Extending CodingTools with custom tools"""
+    """Example: Extending CodingTools with custom tools
+
+    @tool registers each method with the agent; its schema is generated
+    from the signature, so nothing else needs editing.
+    """
 
     @staticmethod
-    def get_git_status():
-        """Custom tool: Get git status"""
-        result = CodingTools.bash_command("git status")
-        return result
+    @tool(read_only=True)
+    def get_git_status() -> dict[str, Any]:
+        """Show the working tree status of the git repository"""
+        return CodingTools.bash_command("git status")
 
     @staticmethod
-    def count_lines_of_code(directory="."):
-        """Custom tool: Count lines of code in Python files"""
-        result = CodingTools.bash_command(
+    @tool(params={"directory": "Directory to count in (default: current directory)"})
+    def count_lines_of_code(directory: str = ".") -> dict[str, Any]:
+        """Count lines of code in the Python files of a directory"""
+        return CodingTools.bash_command(
             f'find {directory} -name "*.py" -exec wc -l {{}} + | tail -1'
         )
-        return result
 
     @staticmethod
-    def list_project_structure(directory="."):
-        """Custom tool: Show project tree"""
-        result = CodingTools.bash_command(f"tree {directory} -I '__pycache__|*.pyc'")
-        return result
+    @tool(params={"directory": "Directory to show (default: current directory)"})
+    def list_project_structure(directory: str = ".") -> dict[str, Any]:
+        """Show the directory tree of a project"""
+        return CodingTools.bash_command(f"tree {directory} -I '__pycache__|*.pyc'")
 
 
 def example_custom_tools():
@@ -105,11 +111,20 @@ def example_custom_tools():
     result = ExtendedTools.get_git_status()
     print(result)
 
-    # Count lines of code
+    # Count lines of code, dispatched by name as the agent does
     print("\nLines of Code:")
-    result = ExtendedTools.count_lines_of_code(".")
+    result = CodingTools.execute_tool("count_lines_of_code", {"directory": "."})
     print(result)
 
+    # The generated schema the model sees
+    print("\nSchema:")
+    definition = next(
+        d
+        for d in get_registry().definitions()
+        if d["function"]["name"] == "count_lines_of_code"
+    )
+    print(json.dumps(definition, indent=2))
+
 
 # ============================================================================
 # EXAMPLE 4: File Operations
@@ -119,7 +134,7 @@ def example_file_operations():
     """Example: File operations with the agent"""
     print("\n=== Example 4: File Operations ===")
 
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     api_key = config_manager.get_api_key()
 
     if not api_key:
@@ -157,7 +172,7 @@ def example_code_testing():
     """Example: Creating and testing code"""
     print("\n=== Example 5: Code Testing ===")
 
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     api_key = config_manager.get_api_key()
 
     if not api_key:
@@ -183,48 +198,43 @@ def how_to_add_custom_tools():
     Guide: How to add custom tools to the agent
 
     Steps:
-    1. Add the tool function to tools.py in the CodingTools class
-    2. Add the function to get_tool_definitions() return list
-    3. Add the tool execution logic to execute_tool() method
+    1. Write a function with type hints and a docstring
+    2. Decorate it with @tool; the schema is generated from the signature
+    3. Import the module before creating the agent, or ship it as a plugin
     4. Use in agent
 
     Example:
     """
 
     example = '''
-    # Step 1: Add to tools.py
+    # Step 1 and 2: Declare the tool
 
-    @staticmethod
-    def search_web(query: str) -> dict[str, Any]:
-        """Search the web for something"""
+    from typing import Any, Literal
+    from tool_registry import tool
+
+    @tool(
+        params={"query": "Search query", "limit": "Maximum results (default: 5)"},
+        read_only=True,
+    )
+    def search_web(
+        query: str, limit: int = 5, region: Literal["us", "eu"] = "us"
+    ) -> dict[str, Any]:
+        """Search the web for information"""
         try:
             # Implementation here
             return {"success": True, "results": [...]}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    # Step 2: Add to get_tool_definitions()
-    {
-        "type": "function",
-        "function": {
-            "name": "search_web",
-            "description": "Search the web for information",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query"
-                    }
-                },
-                "required": ["query"]
-            }
-        }
-    }
-
-    # Step 3: Add to execute_tool()
-    elif tool_name == "search_web":
-        result = CodingTools.search_web(tool_input.get("query", ""))
+    # Arguments without a default are required; Optional[...] and
+    # Literal[...] become optional and enum parameters. Tools are assumed
+    # to have side effects; read_only=True lets calls run concurrently.
+    # An async implementation can be added with @tool_async("search_web").
+
+    # Step 3: Ship it as a plugin (pyproject.toml of your package);
+    # the module is only imported when one of its tools is first called
+    [project.entry-points."groq_agent.tools"]
+    web = "my_tools.web"
 
     # Step 4: Use in agent
     agent.stream_response("Search the web for latest Python news")
@@ -239,32 +249,61 @@ def how_to_add_custom_tools():
 # ============================================================================
 
 def example_with_timing():
-    """Example: Track agent response times"""
-    import time
+    """Example: Measure latency percentiles with the bench harness"""
+    import asyncio
+    from bench import SCENARIO_DIR, load_scenario, print_report, run_scenario
 
     print("\n=== Example 7: Performance Monitoring ===")
 
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     api_key = config_manager.get_api_key()
 
     if not api_key:
         print("API key not configured.")
         return
 
-    agent = CodingAgent(api_key)
+    # Same as: python main.py bench scenarios/chat.json --repeat 1
+    scenario = load_scenario(str(SCENARIO_DIR / "chat.json"))
+    result = asyncio.run(run_scenario(scenario, api_key, repeat=1))
+    print_report({"scenarios": {scenario["name"]: result}})
+
+
+# ============================================================================
+# EXAMPLE 8: Concurrent Sessions
+# ============================================================================
+
+def example_concurrent_sessions():
+    """Example: Several async agent sessions in one event loop"""
+    import asyncio
+    from agent import AsyncCodingAgent
+
+    print("\n=== Example 8: Concurrent Sessions ===")
+
+    config_manager = get_config_manager()
+    api_key = config_manager.get_api_key()
+
+    if not api_key:
+        print("API key not configured.")
+        return
 
     queries = [
-        "Write a hello world function in Python",
-        "Explain list comprehensions briefly",
-        "Create a simple class for a todo item",
+        "Write a one-line Python palindrome check",
+        "Explain Python generators in two sentences",
+        "Show a minimal dataclass example",
     ]
 
-    for i, query in enumerate(queries, 1):
-        print(f"\n{i}. Query: {query}")
-        start_time = time.time()
-        agent.stream_response(query)
-        elapsed_time = time.time() - start_time
-        print(f"\n\nTime taken: {elapsed_time:.2f} seconds")
+    async def run_all():
+        # Each agent runs its tools in its own interpreter and shell
+        agents = [AsyncCodingAgent(api_key) for _ in queries]
+        try:
+            await asyncio.gather(
+                *(agent.stream_response(query) for agent, query in zip(agents, queries))
+            )
+        finally:
+            for agent in agents:
+                agent.close()
+
+    asyncio.run(run_all())
 
 
 # ============================================================================
@@ -284,6 +323,7 @@ if __name__ == "__main__":
         print("5 - Code Testing")
         print("6 - How to Add Custom Tools")
         print("7 - Performance Monitoring")
+        print("8 - Concurrent Sessions")
         sys.exit(1)
 
     example_num = sys.argv[1]
@@ -303,6 +343,8 @@ if __name__ == "__main__":
             how_to_add_custom_tools()
         elif example_num == "7":
             example_with_timing()
+        elif example_num == "8":
+            example_concurrent_sessions()
         else:
             print(f"Unknown example: {example_num}")
     except KeyboardInterrupt:
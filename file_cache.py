@@ -0,0 +1,188 @@
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+# Memory budget for cached mappings and line indexes
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+# Cached files, and memory maps among them; each map holds a file descriptor
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_MAPPED = 32
+# Files up to this size are read into memory instead of mapped
+MMAP_MIN_BYTES = 1024 * 1024
+
+
+class MappedFile:
+    """Read-only contents of a file with a lazily built line-offset index
+
+    Large files are memory mapped; small ones are read into memory, which
+    is as fast for them and doesn't keep a file descriptor open.
+    """
+
+    def __init__(self, path: Path):
+        self.size = path.stat().st_size
+        self._map: Optional[Union[mmap.mmap, bytes]] = None
+        if self.size:
+            with open(path, "rb") as f:
+                if self.size < MMAP_MIN_BYTES:
+                    self._map = f.read()
+                    self.size = len(self._map)
+                else:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._lines: Optional[array] = None
+        self.charged = 0
+        # Readers using the entry; an evicted entry is closed by the last one
+        self.readers = 0
+        self.evicted = False
+
+    @property
+    def mapped(self) -> bool:
+        return isinstance(self._map, mmap.mmap)
+
+    def close(self):
+        if self.mapped:
+            self._map.close()
+        self._map = None
+
+    @property
+    def line_starts(self) -> array:
+        """Byte offset of the start of every line"""
+        if self._lines is None:
+            starts = array("q", [0])
+            if self._map is not None:
+                find = self._map.find
+                position = find(b"\n")
+                while position != -1:
+                    starts.append(position + 1)
+                    position = find(b"\n", position + 1)
+                if starts[-1] == self.size:
+                    starts.pop()
+            self._lines = starts
+        return self._lines
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) if self.size else 0
+
+    @property
+    def footprint(self) -> int:
+        """Approximate memory held by this entry"""
+        index = self._lines.itemsize * len(self._lines) if self._lines else 0
+        return self.size + index
+
+    def read_bytes(self, start: int, end: int) -> bytes:
+        if self._map is None:
+            return b""
+        return self._map[max(0, start) : min(end, self.size)]
+
+    def read_lines(self, start_line: int, end_line: int) -> bytes:
+        """Bytes of 1-based inclusive line range"""
+        starts = self.line_starts
+        first = max(1, start_line) - 1
+        if first >= len(starts):
+            return b""
+        end = starts[end_line] if end_line < len(starts) else self.size
+        return self.read_bytes(starts[first], end)
+
+
+class FileCache:
+    """LRU cache of files keyed on (path, mtime, size)
+
+    Bounded by memory, by entry count and by the number of memory maps,
+    so a long session reading many files can't run out of descriptors.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_mapped: int = DEFAULT_MAX_MAPPED,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_mapped = max_mapped
+        self.used_bytes = 0
+        self._entries: OrderedDict[tuple, MappedFile] = OrderedDict()
+        self._mapped = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(self, path: Path) -> Iterator[MappedFile]:
+        """Contents of the current version of path, held open while in use"""
+        entry = self._get(path)
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.readers -= 1
+                if entry.evicted and not entry.readers:
+                    entry.close()
+
+    def _get(self, path: Path) -> MappedFile:
+        resolved = path.resolve()
+        stat = resolved.stat()
+        key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._charge(entry)
+                entry.readers += 1
+                return entry
+        entry = MappedFile(resolved)
+        with self._lock:
+            entry.readers += 1
+            # Drop outdated versions of the same file
+            for stale in [k for k in self._entries if k[0] == key[0]]:
+                self._evict(stale)
+            self._entries[key] = entry
+            self._mapped += entry.mapped
+            self._charge(entry)
+            while len(self._entries) > 1 and (
+                self.used_bytes > self.max_bytes
+                or len(self._entries) > self.max_entries
+                or self._mapped > self.max_mapped
+            ):
+                self._evict(self._oldest(mapped_only=self._mapped > self.max_mapped))
+        return entry
+
+    def _oldest(self, mapped_only: bool) -> tuple:
+        for key, entry in self._entries.items():
+            if entry.mapped or not mapped_only:
+                return key
+        return next(iter(self._entries))
+
+    def _charge(self, entry: MappedFile):
+        """Account for growth of an entry, e.g. a newly built line index"""
+        self.used_bytes += entry.footprint - entry.charged
+        entry.charged = entry.footprint
+
+    def _evict(self, key: tuple):
+        entry = self._entries.pop(key)
+        self.used_bytes -= entry.charged
+        self._mapped -= entry.mapped
+        entry.evicted = True
+        if not entry.readers:
+            entry.close()
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+
+_cache: Optional[FileCache] = None
+
+
+def get_file_cache() -> FileCache:
+    """File cache of the current process"""
+    global _cache
+    if _cache is None:
+        _cache = FileCache(
+            int(os.getenv("GROQ_AGENT_FILE_CACHE_BYTES", DEFAULT_CACHE_BYTES))
+        )
+    return _cache
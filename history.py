@@ -0,0 +1,178 @@
+import json
+from typing import Iterable, Iterator
+
+# Rough chars-per-token ratio for English text and code
+CHARS_PER_TOKEN = 4
+# Per-message framing overhead (role, separators)
+MESSAGE_OVERHEAD = 4
+# Characters of an elided tool output kept as a hint for the model
+ELIDED_PREVIEW = 200
+# Bullet lines kept in the rolling summary of folded turns
+SUMMARY_MAX_LINES = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for a piece of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_message_tokens(message: dict) -> int:
+    """Estimate the tokens a chat message costs in a request"""
+    tokens = MESSAGE_OVERHEAD + estimate_tokens(message.get("content") or "")
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"]))
+    return tokens
+
+
+class ConversationHistory:
+    """Conversation messages with cached token estimates and rolling compaction
+
+    Each message is estimated once when it is added, so the running total is
+    always current without recounting. When the total exceeds the budget,
+    compact() first elides stale tool outputs, then folds the oldest turns
+    into a short summary message. Appended messages are also written to
+    log (a SessionLog) when one is set.
+    """
+
+    def __init__(self, token_budget: int = 24000, log=None):
+        self.token_budget = token_budget
+        self.log = log
+        self.total_tokens = 0
+        self.compactions = 0
+        self._messages: list[dict] = []
+        self._tokens: list[int] = []
+        self._has_summary = False
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        return self._messages[index]
+
+    def append(self, message: dict):
+        """Add a message and account for its tokens"""
+        self._add(message)
+        if self.log is not None:
+            self.log.append(message)
+
+    def extend(self, messages: Iterable[dict]) -> int:
+        """Add messages replayed from a log without logging them again"""
+        count = 0
+        for message in messages:
+            self._add(message)
+            count += 1
+        return count
+
+    def _add(self, message: dict):
+        tokens = estimate_message_tokens(message)
+        self._messages.append(message)
+        self._tokens.append(tokens)
+        self.total_tokens += tokens
+
+    def clear(self):
+        """Drop all messages"""
+        self._messages = []
+        self._tokens = []
+        self.total_tokens = 0
+        self._has_summary = False
+
+    def _replace(self, index: int, message: dict):
+        """Swap a message in place, adjusting the running total"""
+        tokens = estimate_message_tokens(message)
+        self.total_tokens += tokens - self._tokens[index]
+        self._messages[index] = message
+        self._tokens[index] = tokens
+
+    def _turn_starts(self) -> list[int]:
+        """Indexes of user messages that open a turn"""
+        first = 1 if self._has_summary else 0
+        return [
+            i
+            for i in range(first, len(self._messages))
+            if self._messages[i]["role"] == "user"
+        ]
+
+    def compact(self, reserved_tokens: int = 0) -> int:
+        """Shrink history until it fits the budget, returning tokens freed"""
+        budget = self.token_budget - reserved_tokens
+        if self.total_tokens <= budget:
+            return 0
+        before = self.total_tokens
+        turn_starts = self._turn_starts()
+        current_turn = turn_starts[-1] if turn_starts else len(self._messages)
+
+        # Pass 1: tool outputs from finished turns are the cheapest to lose
+        for i in range(current_turn):
+            if self.total_tokens <= budget:
+                break
+            message = self._messages[i]
+            content = message.get("content") or ""
+            if message["role"] != "tool" or content.startswith("[elided"):
+                continue
+            self._replace(
+                i,
+                {
+                    **message,
+                    "content": f"[elided {len(content)} chars] "
+                    + content[:ELIDED_PREVIEW],
+                },
+            )
+
+        # Pass 2: fold whole old turns into the summary, never the current one
+        dropped_tokens = 0
+        cut = 0
+        for end in turn_starts[1:]:
+            if self.total_tokens - dropped_tokens <= budget:
+                break
+            dropped_tokens += sum(self._tokens[cut:end])
+            cut = end
+        if cut:
+            self._fold(cut)
+
+        self.compactions += 1
+        return before - self.total_tokens
+
+    def _fold(self, cut: int):
+        """Replace messages before `cut` with a summary of them"""
+        lines = []
+        dropped = self._messages[:cut]
+        if self._has_summary:
+            lines.extend(dropped.pop(0)["content"].split("\n"))
+        else:
+            lines.append("[Summary of earlier conversation]")
+        for message in dropped:
+            content = (message.get("content") or "").replace("\n", " ")
+            if message["role"] == "user":
+                lines.append(f"- User asked: {content[:160]}")
+            elif message.get("tool_calls"):
+                names = ", ".join(
+                    call["function"]["name"] for call in message["tool_calls"]
+                )
+                lines.append(f"- Agent used tools: {names}")
+            elif message["role"] == "assistant" and content:
+                lines.append(f"- Agent answered: {content[:160]}")
+
+        lines = lines[:1] + lines[1:][-SUMMARY_MAX_LINES:]
+        summary = {"role": "user", "content": "\n".join(lines)}
+        summary_tokens = estimate_message_tokens(summary)
+        self.total_tokens += summary_tokens - sum(self._tokens[:cut])
+        self._messages[:cut] = [summary]
+        self._tokens[:cut] = [summary_tokens]
+        self._has_summary = True
+
+    def usage(self) -> dict:
+        """Summary of the current context usage"""
+        return {
+            "messages": len(self._messages),
+            "tokens": self.total_tokens,
+            "budget": self.token_budget,
+            "compactions": self.compactions,
+            "tool_tokens": sum(
+                tokens
+                for message, tokens in zip(self._messages, self._tokens)
+                if message["role"] == "tool"
+            ),
+        }
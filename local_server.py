@@ -0,0 +1,328 @@
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+CHAT_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+MODELS_PATHS = ("/openai/v1/models", "/v1/models")
+
+
+@dataclass
+class ServerConfig:
+    """Behaviour of the stand-in server"""
+
+    # Scripted turns; each turn is a list of replies, one per agent step.
+    # A reply has "content" and/or "tool_calls" ([{"name", "arguments"}]).
+    turns: list[list[dict[str, Any]]] = field(default_factory=list)
+    ttft: float = 0.2
+    tokens_per_sec: float = 250.0
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    rate_drop: float = 0.0
+    # Requests per minute before answering 429, 0 for unlimited
+    rpm: int = 0
+    seed: Optional[int] = None
+    # Per-model overrides of the settings above, e.g. a slow or failing model
+    models: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def from_file(cls, path: str, **overrides) -> "ServerConfig":
+        """Load a script or bench scenario file; keyword overrides win"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # Bench scenarios keep the server settings under "server"
+        data = dict(data.get("server", data))
+        data.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**data)
+
+    def for_model(self, model: Optional[str]) -> "ServerConfig":
+        """Settings for requests to model"""
+        overrides = self.models.get(model or "")
+        return replace(self, **overrides) if overrides else self
+
+
+def _tokens(text: str) -> list[str]:
+    """Split text into word-sized stream tokens that join back losslessly"""
+    tokens, current = [], ""
+    for char in text:
+        current += char
+        if char in " \n":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+class StandInState:
+    """State shared by all request handlers of one server"""
+
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.requests = 0
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def take_request(self) -> tuple[bool, int, float]:
+        """Count a request against the RPM window: (allowed, remaining, reset)"""
+        with self.lock:
+            self.requests += 1
+            limit = self.config.rpm
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_count = now, 0
+            reset = 60 - (now - self.window_start)
+            if not limit:
+                return True, 1_000_000, reset
+            if self.window_count >= limit:
+                return False, 0, reset
+            self.window_count += 1
+            return True, limit - self.window_count, reset
+
+    def reply_for(self, messages: list[dict]) -> dict[str, Any]:
+        """Pick the scripted reply for this point in the conversation"""
+        user_indexes = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+        last_user = user_indexes[-1] if user_indexes else -1
+        step = sum(1 for m in messages[last_user + 1 :] if m.get("role") == "assistant")
+        if not self.config.turns:
+            prompt = messages[last_user].get("content", "") if user_indexes else ""
+            return {
+                "content": "This is a stand-in response. You said: "
+                + str(prompt)[:200]
+            }
+        turn = self.config.turns[(len(user_indexes) - 1) % len(self.config.turns)]
+        return turn[min(step, len(turn) - 1)]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Speaks enough of the chat-completions protocol for the agent"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "GroqStandIn/1.0"
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: Optional[dict] = None):
+        self._send_json(
+            status,
+            {"error": {"message": message, "type": "stand_in_error"}},
+            headers,
+        )
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path in MODELS_PATHS:
+            self._send_json(
+                200,
+                {"object": "list", "data": [{"id": "stand-in", "object": "model"}]},
+            )
+        else:
+            self._error(404, f"Unknown path: {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._error(400, "Invalid JSON body")
+            return
+        if self.path not in CHAT_PATHS:
+            self._error(404, f"Unknown path: {self.path}")
+            return
+
+        config = self.state.config.for_model(request.get("model"))
+        allowed, remaining, reset = self.state.take_request()
+        limit_headers = {
+            "x-ratelimit-limit-requests": str(self.state.config.rpm or 1_000_000),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.2f}s",
+        }
+        if not allowed or self.state.roll(config.rate_429):
+            self._error(
+                429,
+                "Rate limit reached (stand-in)",
+                {**limit_headers, "retry-after": str(max(1, round(reset)) if not allowed else 1)},
+            )
+            return
+        if self.state.roll(config.rate_500):
+            self._error(500, "Injected server error (stand-in)")
+            return
+
+        messages = request.get("messages", [])
+        prefill = ""
+        if messages and messages[-1].get("role") == "assistant" and not messages[-1].get("tool_calls"):
+            # A partial assistant message is continued, as the real API does
+            prefill = messages[-1].get("content") or ""
+            messages = messages[:-1]
+        reply = self.state.reply_for(messages)
+        content = reply.get("content") or ""
+        if prefill and content.startswith(prefill):
+            reply = {**reply, "content": content[len(prefill) :]}
+        if request.get("stream"):
+            self._stream(request, reply, limit_headers, config)
+        else:
+            self._send_json(200, self._completion(request, reply), limit_headers)
+
+    def _tool_calls(self, reply: dict) -> list[dict]:
+        return [
+            {
+                "index": index,
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": json.dumps(call.get("arguments", {})),
+                },
+            }
+            for index, call in enumerate(reply.get("tool_calls", []))
+        ]
+
+    def _usage(self, request: dict, completion_tokens: int) -> dict:
+        prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _completion(self, request: dict, reply: dict) -> dict:
+        tool_calls = self._tool_calls(reply)
+        for call in tool_calls:
+            del call["index"]
+        content = reply.get("content")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": content,
+                        **({"tool_calls": tool_calls} if tool_calls else {}),
+                    },
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }
+            ],
+            "usage": self._usage(request, len(_tokens(content or ""))),
+        }
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, request: dict, reply: dict, headers: dict, config: ServerConfig):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        base = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+        }
+
+        def event(delta: dict, finish_reason: Optional[str] = None, **extra) -> bytes:
+            chunk = {
+                **base,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        tokens = _tokens(reply.get("content") or "")
+        tool_calls = self._tool_calls(reply)
+        drop_at = (
+            self.state.random.randint(0, max(len(tokens) - 1, 0))
+            if self.state.roll(config.rate_drop)
+            else None
+        )
+        interval = 1 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+        time.sleep(config.ttft)
+        self._write_chunk(event({"role": "assistant", "content": ""}))
+        for index, token in enumerate(tokens):
+            if index == drop_at:
+                # Simulate a connection lost mid-stream
+                self.close_connection = True
+                self.wfile.flush()
+                self.connection.shutdown(2)
+                return
+            if index and interval:
+                time.sleep(interval)
+            self._write_chunk(event({"content": token}))
+        if tool_calls:
+            self._write_chunk(event({"tool_calls": tool_calls}))
+        usage = self._usage(request, len(tokens))
+        self._write_chunk(
+            event(
+                {},
+                "tool_calls" if tool_calls else "stop",
+                x_groq={"id": completion_id, "usage": usage},
+            )
+        )
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: ServerConfig):
+        super().__init__(address, StandInHandler)
+        self.state = StandInState(config)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients drop idle keep-alive connections when they exit
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(
+    config: ServerConfig, host: str = "127.0.0.1", port: int = 0
+) -> StandInServer:
+    """Start a stand-in server in a background thread (port 0 picks a free one)"""
+    server = StandInServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="stand-in", daemon=True).start()
+    return server
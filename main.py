@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 import sys
+from pathlib import Path
 import click
-from rich.console import Console
-from rich.panel import Panel
-from rich.text import Text
-from config import ConfigManager
-from agent import CodingAgent
+from tracing import configure_tracing
 
-console = Console()
+# Heavy modules (rich, groq, keyring, the agent) are imported by the
+# commands that need them, so --help and status start fast; see
+# startup_check.py for the budget
+_console = None
+
+
+def get_console():
+    """Shared rich console, created on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
 
 
 def show_banner():
@@ -18,11 +28,13 @@ def show_banner():
     │  AI-Powered Code Assistant   │
     ╭──────────────────────────────╮
     """
-    console.print(banner_text)
+    get_console().print(banner_text)
 
 
 def show_welcome():
     """Display welcome message"""
+    from rich.panel import Panel
+
     welcome = Panel(
         "[bold]Welcome to Groq CLI Coding Agent![/bold]\n\n"
         "Type your coding questions or commands.\n"
@@ -30,7 +42,7 @@ def show_welcome():
         border_style="green",
         title="[green]✅ Ready[/green]",
     )
-    console.print(welcome)
+    get_console().print(welcome)
 
 
 @click.group()
@@ -42,11 +54,13 @@ def cli():
 @cli.command()
 def setup():
     """Setup API key"""
-    config_manager = ConfigManager()
+    from config import get_config_manager
+
+    config_manager = get_config_manager()
     if config_manager.setup_api_key():
-        console.print("\n[green]✓ Setup complete![/green]")
+        get_console().print("\n[green]✓ Setup complete![/green]")
     else:
-        console.print("\n[red]✗ Setup failed![/red]")
+        get_console().print("\n[red]✗ Setup failed![/red]")
         sys.exit(1)
 
 
@@ -57,15 +71,118 @@ def setup():
     is_flag=True,
     help="Quick mode (single query, no interactive loop)",
 )
+@click.option(
+    "--tool-workers",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of tool calls run concurrently",
+)
+@click.option(
+    "--max-steps",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of tool-calling rounds per message",
+)
+@click.option(
+    "--context-budget",
+    default=24000,
+    show_default=True,
+    type=click.IntRange(min=1000),
+    help="Estimated token budget before older history is compacted",
+)
+@click.option(
+    "--cache",
+    "cache_mode",
+    type=click.Choice(["off", "cache", "record", "replay"]),
+    default="off",
+    show_default=True,
+    envvar="GROQ_AGENT_CACHE",
+    help="Completion cache: read-through, record only, or offline replay",
+)
+@click.option(
+    "--base-url",
+    default=None,
+    envvar="GROQ_BASE_URL",
+    help="API base URL, e.g. a local stand-in server (default: Groq API)",
+)
+@click.option(
+    "--render",
+    "render_mode",
+    type=click.Choice(["plain", "markdown"]),
+    default="plain",
+    show_default=True,
+    envvar="GROQ_AGENT_RENDER",
+    help="Stream raw text, or render markdown and highlighted code as it arrives",
+)
+@click.option(
+    "--trace",
+    "trace_file",
+    type=click.Path(dir_okay=False),
+    help="Append spans of every turn, request and tool call to FILE",
+)
+@click.option(
+    "--trace-format",
+    type=click.Choice(["jsonl", "otlp"]),
+    default="jsonl",
+    show_default=True,
+    help="One span per line, or OpenTelemetry OTLP/JSON",
+)
+@click.option(
+    "--route/--no-route",
+    default=True,
+    show_default=True,
+    help="Pick a model per step from the router rules, or always use the default",
+)
+@click.option(
+    "--race/--no-race",
+    default=None,
+    envvar="GROQ_AGENT_RACE",
+    help="Start the two best models together and keep the first to stream",
+)
+@click.option(
+    "--resume",
+    "resume_ref",
+    metavar="ID",
+    help="Continue a logged session: its id, a unique prefix, or 'last'",
+)
+@click.option(
+    "--log/--no-log",
+    "log_session",
+    default=None,
+    help="Log the session for --resume [default: on, off with -q]",
+)
 @click.argument("query", required=False, default=None)
-def chat(quick, query):
+def chat(
+    quick,
+    tool_workers,
+    max_steps,
+    context_budget,
+    cache_mode,
+    base_url,
+    render_mode,
+    trace_file,
+    trace_format,
+    route,
+    race,
+    resume_ref,
+    log_session,
+    query,
+):
     """Start interactive chat with the agent"""
-    config_manager = ConfigManager()
+    from config import get_config_manager
+
+    configure_tracing(trace_file, trace_format)
+    config_manager = get_config_manager()
 
     # Check if API key is configured
     api_key = config_manager.get_api_key()
+    if not api_key and (cache_mode == "replay" or base_url):
+        # Replays never reach the API; custom servers may not need a key
+        api_key = "replay" if cache_mode == "replay" else "local"
     if not api_key:
-        console.print(
+        get_console().print(
             "\n[red]✗ API key not configured![/red]\n"
             "Run: [cyan]python main.py setup[/cyan] to configure."
         )
@@ -73,13 +190,45 @@ def chat(quick, query):
 
     try:
         show_banner()
-        agent = CodingAgent(api_key)
+        from agent import CodingAgent, TurnCancelled
+
+        agent = CodingAgent(
+            api_key,
+            max_tool_workers=tool_workers,
+            max_steps=max_steps,
+            context_budget=context_budget,
+            cache_mode=cache_mode,
+            base_url=base_url,
+            render_mode=render_mode,
+            routing=route,
+            race=race,
+        )
+        if resume_ref:
+            resumed = agent.resume_session(resume_ref)
+            if not resumed["success"]:
+                agent.close()
+                get_console().print(f"[red]✗ {resumed['error']}[/red]")
+                sys.exit(1)
+            get_console().print(
+                f"[green]✓ Resumed session {resumed['session_id']}: "
+                f"{resumed['loaded']} of {resumed['messages']} messages "
+                f"in {resumed['load_ms']} ms[/green]"
+            )
+        elif log_session if log_session is not None else not (quick and query):
+            # Quick queries from scripts would otherwise pile up logs
+            agent.start_session()
 
         # Quick mode: process single query
         if quick and query:
-            console.print(f"\n[cyan]👤 You:[/cyan] {query}\n")
-            console.print(f"[green]🤖 Agent:[/green] ", end="")
-            agent.stream_response(query)
+            get_console().print(f"\n[cyan]👤 You:[/cyan] {query}\n")
+            get_console().print(f"[green]🤖 Agent:[/green] ", end="")
+            try:
+                agent.stream_response(query)
+            except TurnCancelled:
+                get_console().print("[yellow]→ Cancelled[/yellow]")
+                sys.exit(130)
+            finally:
+                agent.close()
             return
 
         # Interactive mode
@@ -87,7 +236,9 @@ def chat(quick, query):
 
         while True:
             try:
-                user_input = console.input(
+                # Connection setup overlaps with typing, not the first token
+                agent.prewarm()
+                user_input = get_console().input(
                     "\n[cyan]👤 You:[/cyan] "
                 ).strip()
 
@@ -97,46 +248,253 @@ def chat(quick, query):
                 # Handle commands
                 if user_input.startswith("/"):
                     if user_input == "/exit":
-                        console.print("\n[yellow]🚫 Goodbye![/yellow]")
+                        get_console().print("\n[yellow]🚫 Goodbye![/yellow]")
                         break
                     elif user_input == "/clear":
                         agent.clear_history()
                     elif user_input == "/history":
                         agent.show_history()
+                    elif user_input == "/context":
+                        agent.show_context()
+                    elif user_input == "/save" or user_input.startswith("/save "):
+                        agent.save_session(user_input[len("/save"):].strip() or None)
+                    elif user_input == "/sessions":
+                        agent.show_sessions()
                     elif user_input == "/help":
                         agent.show_commands()
                     else:
-                        console.print(f"[red]Unknown command: {user_input}[/red]")
+                        get_console().print(f"[red]Unknown command: {user_input}[/red]")
                     continue
 
-                # Stream response
-                console.print(f"\n[green]🤖 Agent:[/green] ", end="")
-                agent.stream_response(user_input)
+                # Stream response; Ctrl-C cancels just this turn
+                get_console().print(f"\n[green]🤖 Agent:[/green] ", end="")
+                try:
+                    agent.stream_response(user_input)
+                except TurnCancelled:
+                    get_console().print("[yellow]→ Cancelled[/yellow]")
 
             except KeyboardInterrupt:
-                console.print("\n\n[yellow]🚫 Interrupted. Goodbye![/yellow]")
+                get_console().print("\n\n[yellow]🚫 Interrupted. Goodbye![/yellow]")
                 break
             except Exception as e:
-                console.print(f"\n[red]✗ Error: {e}[/red]")
+                get_console().print(f"\n[red]✗ Error: {e}[/red]")
+
+        agent.close()
+        if agent.session is not None and agent.session.messages:
+            get_console().print(
+                f"Resume with: [cyan]python main.py chat --resume "
+                f"{agent.session.session_id}[/cyan]"
+            )
 
     except Exception as e:
-        console.print(f"[red]✗ Error: {e}[/red]")
+        get_console().print(f"[red]✗ Error: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8765, show_default=True, type=int)
+@click.option(
+    "--script",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file with scripted turns and server settings",
+)
+@click.option("--ttft", type=float, help="Seconds before the first token [0.2]")
+@click.option("--tps", type=float, help="Streamed tokens per second [250]")
+@click.option("--rate-429", type=float, help="Fraction of requests answered 429")
+@click.option("--rate-500", type=float, help="Fraction of requests answered 500")
+@click.option("--rate-drop", type=float, help="Fraction of streams cut mid-way")
+@click.option("--rpm", type=int, help="Requests per minute before 429s")
+@click.option("--seed", type=int, help="Seed for injected failures")
+def serve(host, port, script, ttft, tps, rate_429, rate_500, rate_drop, rpm, seed):
+    """Run a local stand-in for the chat completions API"""
+    from local_server import ServerConfig, StandInServer
+
+    overrides = {
+        "ttft": ttft,
+        "tokens_per_sec": tps,
+        "rate_429": rate_429,
+        "rate_500": rate_500,
+        "rate_drop": rate_drop,
+        "rpm": rpm,
+        "seed": seed,
+    }
+    if script:
+        config = ServerConfig.from_file(script, **overrides)
+    else:
+        config = ServerConfig(**{k: v for k, v in overrides.items() if v is not None})
+    server = StandInServer((host, port), config)
+    get_console().print(
+        f"[green]✓ Stand-in server on {server.url}[/green]\n"
+        f"Run: [cyan]python main.py chat --base-url {server.url}[/cyan]"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        get_console().print(f"\n[yellow]Stopped after {server.state.requests} requests[/yellow]")
+    finally:
+        server.server_close()
+
+
+@cli.command()
+@click.argument("scenarios", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option("--local", is_flag=True, help="Run against an in-process stand-in server")
+@click.option("--base-url", default=None, envvar="GROQ_BASE_URL", help="API base URL")
+@click.option("--repeat", type=click.IntRange(min=1), help="Override scenario repeat count")
+@click.option("--out", type=click.Path(dir_okay=False), help="Write results as JSON")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Earlier --out file to compare against",
+)
+@click.option("--verbose", is_flag=True, help="Show the agent output while running")
+@click.option(
+    "--trace",
+    "trace_file",
+    type=click.Path(dir_okay=False),
+    help="Append spans of every turn, request and tool call to FILE",
+)
+@click.option(
+    "--trace-format",
+    type=click.Choice(["jsonl", "otlp"]),
+    default="jsonl",
+    show_default=True,
+    help="One span per line, or OpenTelemetry OTLP/JSON",
+)
+def bench(
+    scenarios, local, base_url, repeat, out, baseline, verbose, trace_file, trace_format
+):
+    """Benchmark latency and throughput with scenario files"""
+    configure_tracing(trace_file, trace_format)
+    import json
+    from bench import SCENARIO_DIR, print_report, regressions, run_benchmarks
+    from config import get_config_manager
+
+    paths = list(scenarios) or sorted(str(p) for p in SCENARIO_DIR.glob("*.json"))
+    if not paths:
+        get_console().print("[red]✗ No scenario files given or found in scenarios/[/red]")
+        sys.exit(1)
+    api_key = "local" if local else get_config_manager().get_api_key()
+    if not api_key and base_url:
+        api_key = "local"
+    if not api_key:
+        get_console().print(
+            "\n[red]✗ API key not configured![/red]\n"
+            "Use [cyan]--local[/cyan] or run [cyan]python main.py setup[/cyan]."
+        )
+        sys.exit(1)
+
+    results = run_benchmarks(
+        paths, api_key, base_url=base_url, local=local, repeat=repeat, quiet=not verbose
+    )
+    base = None
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+    print_report(results, base)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        get_console().print(f"[green]✓ Results written to {out}[/green]")
+    if base is not None:
+        worse = regressions(results, base)
+        for line in worse:
+            get_console().print(f"[red]✗ Regression: {line}[/red]")
+        if worse:
+            sys.exit(1)
+
+
+@cli.command()
+@click.argument("input_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--out",
+    type=click.Path(dir_okay=False),
+    help="Results file, appended to and resumed from [INPUT.results.jsonl]",
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Sessions run at the same time",
+)
+@click.option("--retry-failed", is_flag=True, help="Run prompts that failed last time again")
+@click.option(
+    "--max-steps",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of tool-calling rounds per prompt",
+)
+@click.option(
+    "--cache",
+    "cache_mode",
+    type=click.Choice(["off", "cache", "record", "replay"]),
+    default="off",
+    show_default=True,
+    envvar="GROQ_AGENT_CACHE",
+    help="Completion cache mode",
+)
+@click.option("--base-url", default=None, envvar="GROQ_BASE_URL", help="API base URL")
+@click.option(
+    "--trace",
+    "trace_file",
+    type=click.Path(dir_okay=False),
+    help="Append spans of every turn, request and tool call to FILE",
+)
+def batch(
+    input_file, out, concurrency, retry_failed, max_steps, cache_mode, base_url, trace_file
+):
+    """Run the prompts of a JSONL file in concurrent sessions"""
+    from batch import run_batch
+    from config import get_config_manager
+
+    configure_tracing(trace_file)
+    api_key = get_config_manager().get_api_key()
+    if not api_key and (cache_mode == "replay" or base_url):
+        api_key = "replay" if cache_mode == "replay" else "local"
+    if not api_key:
+        get_console().print(
+            "\n[red]✗ API key not configured![/red]\n"
+            "Run: [cyan]python main.py setup[/cyan] to configure."
+        )
+        sys.exit(1)
+
+    if out is None:
+        out = str(Path(input_file).with_suffix(".results.jsonl"))
+    failed = run_batch(
+        input_file,
+        out,
+        api_key,
+        concurrency=concurrency,
+        retry_failed=retry_failed,
+        max_steps=max_steps,
+        cache_mode=cache_mode,
+        base_url=base_url,
+    )
+    get_console().print(f"[green]✓ Results in {out}[/green]")
+    if failed:
         sys.exit(1)
 
 
 @cli.command()
 def status():
     """Check configuration status"""
-    config_manager = ConfigManager()
+    from rich.panel import Panel
+    from config import get_config_manager
+
+    config_manager = get_config_manager()
     api_key_set = config_manager.check_api_key()
     config = config_manager.load_config()
 
     status_info = Panel(
-        f"API Key Configured: [{'green'}✓[/] yes" if api_key_set else "[red]✗[/] no\n",
+        "API Key Configured: "
+        + ("[green]✓[/] yes" if api_key_set else "[red]✗[/] no"),
         title="[bold]Status[/bold]",
         border_style="blue",
     )
-    console.print(status_info)
+    get_console().print(status_info)
 
 
 if __name__ == "__main__":
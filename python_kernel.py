@@ -0,0 +1,234 @@
+import atexit
+import json
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+from typing import Any, Optional
+
+# Kernels wait on their pipe with select() and stop with process groups,
+# which Windows lacks; execute_python runs each call in a fresh
+# interpreter there instead
+KERNELS_SUPPORTED = os.name != "nt"
+
+# Executed by each worker interpreter. Protocol: one JSON request per line
+# on the original stdin, one JSON reply per line on the original stdout.
+# fds 0-2 are re-pointed so user code cannot corrupt the protocol, and
+# output from subprocesses and C extensions is captured along with print().
+WORKER_SOURCE = r"""
+import ast, io, json, os, signal, sys, tempfile, traceback
+proto_in = os.fdopen(os.dup(0), "rb")
+proto_out = os.fdopen(os.dup(1), "wb")
+null = os.open(os.devnull, os.O_RDONLY)
+os.dup2(null, 0)
+captures = []
+for fd in (1, 2):
+    capture = tempfile.TemporaryFile()
+    os.dup2(capture.fileno(), fd)
+    captures.append(capture)
+sys.stdin = open(os.devnull)
+sys.stdout = io.TextIOWrapper(open(1, "wb", buffering=0, closefd=False), write_through=True)
+sys.stderr = io.TextIOWrapper(open(2, "wb", buffering=0, closefd=False), write_through=True)
+namespace = {"__name__": "__main__"}
+
+def drain(capture):
+    capture.seek(0)
+    data = capture.read()
+    capture.seek(0)
+    capture.truncate()
+    return data.decode("utf-8", "replace")
+
+def run(code):
+    tree = ast.parse(code, "<agent>", "exec")
+    tail = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        tail = ast.Expression(tree.body.pop().value)
+    exec(compile(tree, "<agent>", "exec"), namespace)
+    if tail is not None:
+        value = eval(compile(tail, "<agent>", "eval"), namespace)
+        if value is not None:
+            print(repr(value))
+
+# SIGINT only interrupts user code, never the idle protocol loop
+signal.signal(signal.SIGINT, signal.SIG_IGN)
+for line in proto_in:
+    request = json.loads(line)
+    ok = True
+    try:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            run(request["code"])
+        finally:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+    except KeyboardInterrupt:
+        ok = False
+        print("KeyboardInterrupt: execution interrupted", file=sys.stderr)
+    except BaseException as e:
+        ok = False
+        # Hide the worker's own frames
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != "<agent>":
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    reply = {"ok": ok, "output": drain(captures[0]), "error": drain(captures[1])}
+    proto_out.write(json.dumps(reply).encode() + b"\n")
+    proto_out.flush()
+"""
+
+# Seconds a worker gets to answer after SIGINT before it is killed
+INTERRUPT_GRACE = 1.0
+
+
+class KernelCrashed(Exception):
+    """The worker interpreter died or stopped answering"""
+
+
+class PythonKernel:
+    """A long-lived worker interpreter with a persistent namespace"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ["python", "-u", "-c", WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _read_reply(self, deadline: float) -> Optional[dict]:
+        """Next reply line, or None once the deadline passes"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        ready, _, _ = select.select([self.process.stdout], [], [], remaining)
+        if not ready:
+            return None
+        line = self.process.stdout.readline()
+        if not line:
+            raise KernelCrashed("Python worker exited")
+        return json.loads(line)
+
+    def execute(self, code: str, timeout: float = 10) -> dict[str, Any]:
+        """Run code in the worker namespace"""
+        with self._lock:
+            try:
+                self.process.stdin.write(json.dumps({"code": code}).encode() + b"\n")
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                raise KernelCrashed("Python worker exited")
+            reply = self._read_reply(time.monotonic() + timeout)
+            if reply is not None:
+                return {**reply, "timed_out": False}
+            self.interrupt()
+            reply = self._read_reply(time.monotonic() + INTERRUPT_GRACE)
+            if reply is None:
+                self.kill()
+                raise KernelCrashed(f"Python worker hung after {timeout}s timeout")
+            return {**reply, "timed_out": True}
+
+    def interrupt(self):
+        """Raise KeyboardInterrupt in the running code"""
+        if self.alive:
+            os.kill(self.process.pid, signal.SIGINT)
+
+    def kill(self):
+        """Stop the worker and anything it started"""
+        if self.alive:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                self.process.kill()
+        self.process.wait()
+
+
+class KernelPool:
+    """Per-session kernels plus one pre-started spare for fast (re)starts"""
+
+    def __init__(self):
+        self._kernels: dict[str, PythonKernel] = {}
+        self._spare: Optional[PythonKernel] = None
+        self._lock = threading.Lock()
+
+    def _take_spare(self) -> PythonKernel:
+        spare, self._spare = self._spare, None
+        if spare is None or not spare.alive:
+            spare = PythonKernel()
+        # Start the next spare now so a restart never waits on startup
+        self._spare = PythonKernel()
+        return spare
+
+    def get(self, session: str = "default") -> PythonKernel:
+        """Kernel of a session, starting one if needed"""
+        with self._lock:
+            kernel = self._kernels.get(session)
+            if kernel is None or not kernel.alive:
+                kernel = self._kernels[session] = self._take_spare()
+            return kernel
+
+    def close(self, session: str = "default"):
+        """Stop a session's kernel; the next execute starts a fresh one"""
+        with self._lock:
+            kernel = self._kernels.pop(session, None)
+        if kernel is not None:
+            kernel.kill()
+
+    def execute(
+        self, code: str, timeout: float = 10, session: str = "default"
+    ) -> dict[str, Any]:
+        """Run code in the session kernel, restarting it if it crashes"""
+        kernel = self.get(session)
+        try:
+            result = kernel.execute(code, timeout)
+        except KernelCrashed as e:
+            self.close(session)
+            return {
+                "success": False,
+                "error": f"{e}; the interpreter was restarted and its state lost",
+            }
+        if result["timed_out"]:
+            return {
+                "success": False,
+                "output": result["output"],
+                "error": f"Code execution timeout ({timeout:g}s)\n{result['error']}",
+            }
+        return {
+            "success": True,
+            "output": result["output"],
+            "error": result["error"] or None,
+        }
+
+    def interrupt(self, session: str = "default"):
+        """Interrupt whatever the session kernel is running"""
+        kernel = self._kernels.get(session)
+        if kernel is not None:
+            kernel.interrupt()
+
+    def shutdown(self):
+        with self._lock:
+            kernels = list(self._kernels.values())
+            if self._spare is not None:
+                kernels.append(self._spare)
+            self._kernels, self._spare = {}, None
+        for kernel in kernels:
+            kernel.kill()
+
+
+_pool: Optional[KernelPool] = None
+
+
+def get_kernel_pool() -> KernelPool:
+    """Kernel pool of the current process"""
+    global _pool
+    if _pool is None:
+        _pool = KernelPool()
+        atexit.register(_pool.shutdown)
+    return _pool
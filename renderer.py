@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from typing import Any, Optional
+from rich.console import Console
+
+RENDER_MODES = ("plain", "markdown")
+# Upper bound on terminal redraws per second
+DEFAULT_FPS = 20
+CODE_THEME = "monokai"
+
+
+class StreamRenderer:
+    """Buffers streamed model output and draws it at a capped frame rate
+
+    Chunks are appended to a list and written at most fps times a second,
+    so terminal writes never throttle the stream. In markdown mode,
+    finished blocks (paragraphs, closed code fences) are rendered once and
+    printed for good; only the unfinished tail block is re-rendered, in a
+    Live region, on each frame.
+    """
+
+    def __init__(self, console: Console, mode: str = "plain", fps: float = DEFAULT_FPS):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {mode}")
+        self.console = console
+        self.mode = mode
+        self.interval = 1 / fps
+        self.chunks: list[str] = []
+        # plain: chunks not yet written
+        self._pending: list[str] = []
+        self._last_flush = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # markdown: lines of the open block and the unfinished current line
+        self._block: list[str] = []
+        self._line: list[str] = []
+        self._fence: Optional[str] = None
+        self._version = 0
+        self._rendered: tuple[int, Any] = (-1, None)
+        self._lock = threading.Lock()
+        self._live = None
+
+    def start(self):
+        if self.mode == "markdown":
+            # Imported here so plain mode never pays for the markdown parser
+            from rich.live import Live
+
+            self._live = Live(
+                console=self.console,
+                refresh_per_second=1 / self.interval,
+                vertical_overflow="visible",
+                get_renderable=self._tail_renderable,
+            )
+            self._live.start()
+
+    def feed(self, text: str):
+        """Add a streamed chunk"""
+        self.chunks.append(text)
+        if self.mode == "markdown":
+            self._feed_markdown(text)
+            return
+        self._pending.append(text)
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+        elif self._timer is None:
+            # Make sure a pause in the stream does not strand buffered text
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._timer = loop.call_later(self.interval, self.flush)
+
+    def flush(self):
+        """Write buffered plain text now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_flush = time.monotonic()
+        if self._pending:
+            text = "".join(self._pending)
+            self._pending.clear()
+            self.console.print(text, end="", markup=False, highlight=False)
+
+    def _feed_markdown(self, text: str):
+        if "\n" not in text:
+            with self._lock:
+                self._line.append(text)
+                self._version += 1
+            return
+        finished = []
+        with self._lock:
+            self._line.append(text)
+            *lines, rest = "".join(self._line).split("\n")
+            self._line = [rest] if rest else []
+            for line in lines:
+                self._block.append(line + "\n")
+                stripped = line.strip()
+                if self._fence is None:
+                    if stripped.startswith(("```", "~~~")):
+                        self._fence = stripped[:3]
+                    elif not stripped and len(self._block) > 1:
+                        finished.append("".join(self._block))
+                        self._block = []
+                    elif not stripped:
+                        self._block = []
+                elif stripped.startswith(self._fence):
+                    self._fence = None
+                    finished.append("".join(self._block))
+                    self._block = []
+            self._version += 1
+        if not finished:
+            return
+        from rich.markdown import Markdown
+
+        for block in finished:
+            # Printed above the Live region, then never redrawn
+            self.console.print(Markdown(block, code_theme=CODE_THEME))
+
+    def _tail_renderable(self):
+        with self._lock:
+            version, markdown = self._rendered
+            if version == self._version:
+                return markdown if markdown is not None else ""
+            version = self._version
+            tail = "".join(self._block) + "".join(self._line)
+        from rich.markdown import Markdown
+
+        # Parse outside the lock so feed() never waits on rendering
+        markdown = Markdown(tail, code_theme=CODE_THEME) if tail.strip() else None
+        self._rendered = (version, markdown)
+        return markdown if markdown is not None else ""
+
+    def finish(self) -> str:
+        """Draw everything left and return the full text"""
+        if self.mode == "markdown":
+            if self._live is not None:
+                self._live.stop()
+                self._live = None
+        else:
+            self.flush()
+        self.console.print()
+        return "".join(self.chunks)
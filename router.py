@@ -0,0 +1,172 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Small model for quick questions; everything else goes to the agent's model
+FAST_MODEL = "llama-3.1-8b-instant"
+STRONG_MODEL = "llama-3.3-70b-versatile"
+
+DEFAULT_ROUTER = {
+    # First matching rule picks the model of a step; none matching means
+    # the agent's default model
+    "rules": [
+        {
+            "model": FAST_MODEL,
+            "max_prompt_chars": 300,
+            "max_history_tokens": 2000,
+            "tools": False,
+        },
+    ],
+    # Tried in order when a model errors or is slow to start streaming;
+    # the agent's default model is always the last resort
+    "fallbacks": {FAST_MODEL: [], "mixtral-8x7b-32768": [STRONG_MODEL]},
+    # Seconds to wait for the first token before falling back, 0 for never
+    "first_token_timeout": 10.0,
+    # Retries on a model before moving to its fallback
+    "retries_before_fallback": 1,
+    # Seconds a failed model is tried after its fallbacks
+    "cooldown": 60.0,
+    "race": False,
+}
+# Weight of the newest sample in the moving average of time to first token
+TTFT_SMOOTHING = 0.3
+
+
+@dataclass
+class RouteRule:
+    """Conditions of one routing rule; None means any"""
+
+    model: str
+    min_prompt_chars: int = 0
+    max_prompt_chars: Optional[int] = None
+    min_history_tokens: int = 0
+    max_history_tokens: Optional[int] = None
+    # Whether the step answers tool results of the current turn
+    tools: Optional[bool] = None
+
+    def matches(self, prompt_chars: int, history_tokens: int, tools: bool) -> bool:
+        return (
+            prompt_chars >= self.min_prompt_chars
+            and (self.max_prompt_chars is None or prompt_chars <= self.max_prompt_chars)
+            and history_tokens >= self.min_history_tokens
+            and (
+                self.max_history_tokens is None
+                or history_tokens <= self.max_history_tokens
+            )
+            and (self.tools is None or self.tools == tools)
+        )
+
+
+class ModelRouter:
+    """Picks the model of each completion and the models to fall back to
+
+    Time to first token and failures of every model are tracked; a model
+    that failed recently is moved behind its fallbacks until its cooldown
+    ends, so one broken model doesn't cost every turn a timeout.
+    """
+
+    def __init__(self, config: Optional[dict[str, Any]] = None):
+        config = {**DEFAULT_ROUTER, **(config or {})}
+        self.rules = [RouteRule(**rule) for rule in config["rules"]]
+        self.fallbacks: dict[str, list[str]] = config["fallbacks"]
+        self.first_token_timeout = float(config["first_token_timeout"]) or None
+        self.retries_before_fallback = int(config["retries_before_fallback"])
+        self.cooldown = float(config["cooldown"])
+        self.race = bool(config["race"])
+        self.ttft: dict[str, float] = {}
+        self.completions: dict[str, int] = {}
+        self.failed_at: dict[str, float] = {}
+
+    def route(
+        self, default: str, prompt_chars: int, history_tokens: int, tools: bool
+    ) -> list[str]:
+        """Models to try for a step, best first"""
+        model = next(
+            (
+                rule.model
+                for rule in self.rules
+                if rule.matches(prompt_chars, history_tokens, tools)
+            ),
+            default,
+        )
+        candidates = [model]
+        for fallback in [*self.fallbacks.get(model, []), default]:
+            if fallback not in candidates:
+                candidates.append(fallback)
+        now = time.monotonic()
+        healthy = [m for m in candidates if now - self.failed_at.get(m, -1e9) > self.cooldown]
+        return healthy + [m for m in candidates if m not in healthy]
+
+    def succeeded(self, model: str, ttft: Optional[float]):
+        self.failed_at.pop(model, None)
+        self.completions[model] = self.completions.get(model, 0) + 1
+        if ttft is not None:
+            previous = self.ttft.get(model)
+            self.ttft[model] = (
+                ttft
+                if previous is None
+                else previous + TTFT_SMOOTHING * (ttft - previous)
+            )
+
+    def failed(self, model: str):
+        self.failed_at[model] = time.monotonic()
+
+
+class PrefetchedStream:
+    """A completion stream read up to its first token
+
+    Reading ahead is what lets a caller time out on, or race, the first
+    token; the chunks read are replayed before the rest of the stream.
+    """
+
+    def __init__(self, response, iterator, chunks: list, first_token: Optional[float]):
+        self.response = response
+        self.first_token = first_token
+        self._iterator = iterator
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            yield chunk
+        self._chunks = []
+        async for chunk in self._iterator:
+            yield chunk
+
+    async def close(self):
+        await self.response.close()
+
+
+async def prefetch(response) -> PrefetchedStream:
+    """Read a stream until it produces text or a tool call, or ends"""
+    iterator = response.__aiter__()
+    chunks = []
+    try:
+        while True:
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return PrefetchedStream(response, iterator, chunks, None)
+            chunks.append(chunk)
+            if chunk.choices and (
+                chunk.choices[0].delta.content or chunk.choices[0].delta.tool_calls
+            ):
+                return PrefetchedStream(response, iterator, chunks, time.perf_counter())
+    except BaseException:
+        await response.close()
+        raise
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_router() -> ModelRouter:
+    """Process-wide router, configured by the "router" key of config.json"""
+    global _router
+    if _router is None:
+        from config import get_config_manager
+
+        _router = ModelRouter(get_config_manager().load_config().get("router"))
+    return _router
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import random
+import re
+import time
+import weakref
+from collections import deque
+from typing import Any, Optional
+
+# Requests/tokens per minute; unset means only learn limits from headers
+DEFAULT_RPM = float(os.getenv("GROQ_AGENT_RPM", "0"))
+DEFAULT_TPM = float(os.getenv("GROQ_AGENT_TPM", "0"))
+DEFAULT_MAX_CONCURRENCY = 8
+BASE_DELAY = 0.5
+MAX_DELAY = 30.0
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate-limit reset header such as '1m2.5s', '120ms' or '7'"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed completion is worth another attempt"""
+    import httpx
+    from groq import APIConnectionError, APIError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    # Connection failures, timeouts and error events inside a stream
+    return isinstance(error, (APIConnectionError, APIError, httpx.TransportError))
+
+
+class TokenBucket:
+    """Budget refilled continuously at per_minute / 60 per second
+
+    The level may go negative when actual usage turns out larger than
+    what was reserved; later callers then wait it off.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        rate = self.capacity / 60
+        self.level = min(self.capacity, self.level + (now - self.updated) * rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount is available, 0 if it is now"""
+        self._refill()
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.capacity / 60)
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]):
+        """Adopt the server's view of the limit and what is left of it"""
+        self._refill()
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+
+class RateLimitScheduler:
+    """Gates every completion request of one event loop
+
+    Requests wait for room in the request and token buckets and for a
+    concurrency slot. The concurrency limit grows by one per limit's
+    worth of successes and halves on every 429 (AIMD); a 429 also pauses
+    all new requests until the server's reset time, so sessions don't
+    stampede the API together.
+    """
+
+    def __init__(
+        self,
+        rpm: float = DEFAULT_RPM,
+        tpm: float = DEFAULT_TPM,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self, tokens: int):
+        """Wait for a concurrency slot and budget for a request"""
+        while self.active >= max(1, int(self.limit)):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    self._wake()  # Pass on a wake-up this task can't use
+                raise
+        self.active += 1
+        try:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if self.requests is not None:
+                    delay = max(delay, self.requests.delay(1))
+                if self.tokens is not None:
+                    delay = max(delay, self.tokens.delay(tokens))
+                if delay <= 0:
+                    break
+                # Jitter so waiting sessions don't all fire at the same instant
+                await asyncio.sleep(delay * random.uniform(1.0, 1.2))
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def _wake(self):
+        free = max(1, int(self.limit)) - self.active
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def observe(self, headers: Any):
+        """Learn limits from a response's x-ratelimit-* headers"""
+        if not headers:
+            return
+
+        def number(name: str) -> Optional[float]:
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        token_limit = number("x-ratelimit-limit-tokens")
+        if token_limit:
+            if self.tokens is None:
+                self.tokens = TokenBucket(token_limit)
+            self.tokens.sync(token_limit, number("x-ratelimit-remaining-tokens"))
+        if number("x-ratelimit-remaining-requests") == 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.paused_until = max(self.paused_until, time.monotonic() + reset)
+
+    def record_usage(self, reserved: int, actual: int):
+        """Charge the token bucket for usage beyond what was reserved"""
+        if self.tokens is not None and actual > reserved:
+            self.tokens.take(actual - reserved)
+
+    def succeeded(self):
+        """Additive increase of the concurrency limit"""
+        if self.limit < self.max_concurrency:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._wake()
+
+    async def backoff(self, attempt: int, error: BaseException):
+        """Sleep before retry attempt, honouring any retry-after from the server"""
+        from groq import APIStatusError
+
+        self.retries += 1
+        delay = min(MAX_DELAY, BASE_DELAY * 2**attempt) * random.uniform(0.5, 1.0)
+        if isinstance(error, APIStatusError) and error.status_code == 429:
+            self.rate_limited += 1
+            # Multiplicative decrease
+            self.limit = max(1.0, self.limit / 2)
+            headers = error.response.headers
+            self.observe(headers)
+            server_delay = parse_duration(headers.get("retry-after")) or parse_duration(
+                headers.get("x-ratelimit-reset-tokens")
+            )
+            if server_delay:
+                delay = max(delay, server_delay)
+                self.paused_until = max(self.paused_until, time.monotonic() + server_delay)
+        await asyncio.sleep(delay)
+
+
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RateLimitScheduler]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Scheduler shared by all sessions on the running event loop"""
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _schedulers[loop] = RateLimitScheduler()
+    return scheduler
@@ -0,0 +1,291 @@
+import fnmatch
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from config import CONFIG_DIR
+from walker import walk
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+INDEX_DIR = CONFIG_DIR / "index"
+# Larger files are assumed to be generated or data and are not indexed
+MAX_FILE_BYTES = 1024 * 1024
+# Seconds between full walks looking for new, changed or deleted files
+REFRESH_INTERVAL = 10.0
+INDEX_VERSION = 1
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _literal_runs(items, runs: list[str]):
+    """Collect literal strings every match of a parsed regex must contain"""
+    current: list[str] = []
+
+    def flush():
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+        elif op is sre_parse.SUBPATTERN:
+            flush()
+            _literal_runs(av[-1], runs)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            flush()
+            _literal_runs(av[2], runs)
+        elif op is sre_parse.AT:
+            continue
+        else:
+            flush()
+    flush()
+
+
+def required_trigrams(pattern: str) -> set[str]:
+    """Lower-cased trigrams any match of pattern must contain"""
+    runs: list[str] = []
+    try:
+        _literal_runs(sre_parse.parse(pattern), runs)
+    except Exception:
+        return set()
+    trigrams: set[str] = set()
+    for run in runs:
+        trigrams |= _trigrams(run.lower())
+    return trigrams
+
+
+class TrigramIndex:
+    """Persistent, incrementally updated trigram index of a directory tree
+
+    The index maps every lower-cased trigram to the ids of files containing
+    it. A query intersects the postings of the trigrams its pattern must
+    contain, and only those candidate files are scanned with the regex.
+    """
+
+    def __init__(self, root: str = "."):
+        self.root = Path(root).resolve()
+        digest = hashlib.sha1(str(self.root).encode()).hexdigest()[:16]
+        self.path = INDEX_DIR / f"{digest}.trigrams"
+        self.files: list[Optional[str]] = []
+        self.meta: dict[str, tuple[int, int, int]] = {}
+        self.postings: dict[str, set[int]] = {}
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data["files"]
+                self.meta = data["meta"]
+                self.postings = data["postings"]
+        except (OSError, pickle.PickleError, EOFError, KeyError, AttributeError):
+            pass
+
+    def _save(self):
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(temp, "wb") as f:
+            pickle.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "files": self.files,
+                    "meta": self.meta,
+                    "postings": self.postings,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(temp, self.path)
+
+    def _read_text(self, rel: str) -> Optional[str]:
+        """File text, or None for binary, oversized or unreadable files"""
+        try:
+            with open(self.root / rel, "rb") as f:
+                data = f.read(MAX_FILE_BYTES + 1)
+        except OSError:
+            return None
+        if len(data) > MAX_FILE_BYTES or b"\0" in data[:8192]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def _index_files(self, changed: dict[str, tuple[int, int]], removed: set[str]):
+        """Drop stale postings, then index changed files under fresh ids"""
+        stale = set()
+        for rel in list(changed) + list(removed):
+            if rel in self.meta:
+                file_id = self.meta.pop(rel)[0]
+                self.files[file_id] = None
+                stale.add(file_id)
+        if stale:
+            for trigram in list(self.postings):
+                ids = self.postings[trigram]
+                ids -= stale
+                if not ids:
+                    del self.postings[trigram]
+        for rel, (mtime, size) in changed.items():
+            text = self._read_text(rel)
+            file_id = len(self.files)
+            self.files.append(rel)
+            self.meta[rel] = (file_id, mtime, size)
+            if text is None:
+                continue
+            for trigram in _trigrams(text.lower()):
+                self.postings.setdefault(trigram, set()).add(file_id)
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-index files whose mtime or size changed, returning the count"""
+        with self._lock:
+            if not force and time.monotonic() - self.last_refresh < REFRESH_INTERVAL:
+                return 0
+            seen = set()
+            changed = {}
+            for rel, entry, is_dir in walk(str(self.root)):
+                if is_dir:
+                    continue
+                seen.add(rel)
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                known = self.meta.get(rel)
+                if not known or known[1:] != (stat.st_mtime_ns, stat.st_size):
+                    changed[rel] = (stat.st_mtime_ns, stat.st_size)
+            removed = set(self.meta) - seen
+            if changed or removed:
+                self._index_files(changed, removed)
+                # Compact ids once tombstones dominate
+                if len(self.files) > 2 * max(len(self.meta), 1000):
+                    current = {rel: meta[1:] for rel, meta in sorted(self.meta.items())}
+                    self.files, self.meta, self.postings = [], {}, {}
+                    self._index_files(current, set())
+                self._save()
+            self.last_refresh = time.monotonic()
+            return len(changed) + len(removed)
+
+    def mark_stale(self):
+        """Walk the tree again on the next search, e.g. after a tool wrote files"""
+        self.last_refresh = 0.0
+
+    def _refresh_file(self, rel: str):
+        """Re-index one candidate if it changed since the last refresh"""
+        try:
+            stat = (self.root / rel).stat()
+        except OSError:
+            self._index_files({}, {rel})
+            return
+        if self.meta[rel][1:] != (stat.st_mtime_ns, stat.st_size):
+            self._index_files({rel: (stat.st_mtime_ns, stat.st_size)}, set())
+
+    def search(
+        self,
+        pattern: str,
+        path_glob: Optional[str] = None,
+        literal: bool = False,
+        ignore_case: bool = False,
+        context: int = 0,
+        max_results: int = 50,
+    ) -> dict[str, Any]:
+        """Find lines matching pattern as file:line hits with context"""
+        regex_source = re.escape(pattern) if literal else pattern
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        regex = re.compile(regex_source, flags)
+        self.refresh()
+
+        with self._lock:
+            trigrams = required_trigrams(regex_source)
+            if trigrams:
+                postings = sorted(
+                    (self.postings.get(t, set()) for t in trigrams), key=len
+                )
+                candidate_ids = set(postings[0]).intersection(*postings[1:])
+                candidates = sorted(
+                    self.files[i] for i in candidate_ids if self.files[i]
+                )
+            else:
+                candidates = sorted(self.meta)
+            if path_glob:
+                candidates = [
+                    rel
+                    for rel in candidates
+                    if fnmatch.fnmatch(rel if "/" in path_glob else Path(rel).name, path_glob)
+                ]
+            for rel in candidates:
+                self._refresh_file(rel)
+
+        matches = []
+        truncated = False
+        for rel in candidates:
+            text = self._read_text(rel)
+            if text is None:
+                continue
+            lines = None
+            line_number = 1
+            position = 0
+            last_line = 0
+            for match in regex.finditer(text):
+                line_number += text.count("\n", position, match.start())
+                position = match.start()
+                if line_number == last_line:
+                    continue
+                last_line = line_number
+                if lines is None:
+                    lines = text.split("\n")
+                    # A final newline ends the last line rather than starting one
+                    if text.endswith("\n"):
+                        lines.pop()
+                if line_number > len(lines):
+                    break
+                if len(matches) == max_results:
+                    truncated = True
+                    break
+                hit = {"file": rel, "line": line_number, "text": lines[line_number - 1]}
+                if context:
+                    first = max(0, line_number - 1 - context)
+                    hit["context"] = "\n".join(
+                        f"{n}{':' if n == line_number else '-'} {lines[n - 1]}"
+                        for n in range(first + 1, min(len(lines), line_number + context) + 1)
+                    )
+                matches.append(hit)
+            if truncated:
+                break
+        return {
+            "matches": matches,
+            "files_scanned": len(candidates),
+            "files_indexed": len(self.meta),
+            "truncated": truncated,
+        }
+
+
+_indexes: dict[Path, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str = ".") -> TrigramIndex:
+    """Trigram index for root, shared within the process"""
+    key = Path(root).resolve()
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = TrigramIndex(str(key))
+        return _indexes[key]
+
+
+def mark_indexes_stale():
+    """Have every index walk its tree again on the next search"""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.mark_stale()
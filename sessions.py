@@ -0,0 +1,171 @@
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from config import CONFIG_DIR
+
+SESSIONS_DIR = CONFIG_DIR / "sessions"
+SUFFIX = ".jsonl"
+# Characters of the first prompt shown by /sessions
+PREVIEW_CHARS = 60
+
+SESSION_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+def new_session_id() -> str:
+    """Sortable id: start time plus a short random suffix"""
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:4]
+
+
+class SessionLog:
+    """Append-only JSONL log of one conversation's messages
+
+    Each message is written as one line when it is added, so saving costs
+    the same for the first message as for the ten-thousandth and a crash
+    loses at most the line being written. Compaction only changes the
+    in-memory history; the log keeps every original message.
+    """
+
+    def __init__(self, session_id: Optional[str] = None, root: Path = SESSIONS_DIR):
+        self.root = root
+        self.session_id = session_id or new_session_id()
+        self.messages = 0
+        self._file = None
+
+    @property
+    def path(self) -> Path:
+        return self.root / f"{self.session_id}{SUFFIX}"
+
+    def _open(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+b")
+        # Terminate a line cut off by a crash so the next one parses
+        if self._file.seek(0, os.SEEK_END):
+            self._file.seek(-1, os.SEEK_END)
+            if self._file.read(1) != b"\n":
+                self._file.write(b"\n")
+
+    def append(self, message: dict):
+        """Write one message as a line and flush it"""
+        if self._file is None:
+            self._open()
+        line = json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+        self._file.write(line.encode("utf-8") + b"\n")
+        self._file.flush()
+        self.messages += 1
+
+    def read(self, max_bytes: Optional[int] = None) -> Iterator[dict]:
+        """Messages of the log in order, parsed as they are read
+
+        With max_bytes only the end of the log is read, starting at the
+        first user message in that window, so resuming a long session
+        costs the same as resuming a short one.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            skip_to_turn = False
+            if max_bytes is not None and f.seek(0, os.SEEK_END) > max_bytes:
+                f.seek(-max_bytes, os.SEEK_END)
+                f.readline()  # Most likely the middle of a line
+                skip_to_turn = True
+            else:
+                f.seek(0)
+            for line in f:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # Partial line of an interrupted write
+                if not isinstance(message, dict) or "role" not in message:
+                    continue
+                if skip_to_turn:
+                    # Tool results must not lose the call that asked for them
+                    if message["role"] != "user":
+                        continue
+                    skip_to_turn = False
+                yield message
+
+    def count(self) -> int:
+        """Number of messages in the log, without parsing them"""
+        try:
+            with open(self.path, "rb") as f:
+                return f.read().count(b"\n")
+        except FileNotFoundError:
+            return 0
+
+    def save(self, name: Optional[str] = None) -> dict[str, Any]:
+        """Sync the log to disk, optionally renaming the session"""
+        if name and not SESSION_ID_PATTERN.match(name):
+            return {
+                "success": False,
+                "error": "Use letters, digits, '.', '_' or '-' in session names",
+            }
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        if name and name != self.session_id:
+            target = self.root / f"{name}{SUFFIX}"
+            if target.exists():
+                return {"success": False, "error": f"Session {name} already exists"}
+            self.root.mkdir(parents=True, exist_ok=True)
+            if self.path.exists():
+                self.close()
+                os.replace(self.path, target)
+            self.session_id = name
+        return {"success": True, "session_id": self.session_id, "path": str(self.path)}
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def find_session(ref: str, root: Path = SESSIONS_DIR) -> Optional[str]:
+    """Session id for an exact id, a unique prefix of one, or 'last'"""
+    if ref == "last":
+        sessions = list_sessions(root, limit=1)
+        return sessions[0]["id"] if sessions else None
+    if SESSION_ID_PATTERN.match(ref) and (root / f"{ref}{SUFFIX}").exists():
+        return ref
+    matches = [p.stem for p in root.glob(f"*{SUFFIX}") if p.stem.startswith(ref)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _first_prompt(path: Path) -> str:
+    """Start of the first user message, reading only as far as needed"""
+    with open(path, "rb") as f:
+        for line in f:
+            if b'"role":"user"' not in line:
+                continue
+            try:
+                content = json.loads(line).get("content") or ""
+            except ValueError:
+                continue
+            return content.replace("\n", " ")[:PREVIEW_CHARS]
+    return ""
+
+
+def list_sessions(root: Path = SESSIONS_DIR, limit: int = 20) -> list[dict[str, Any]]:
+    """Most recently updated sessions first"""
+    try:
+        entries = [(p, p.stat()) for p in root.glob(f"*{SUFFIX}")]
+    except OSError:
+        return []
+    entries.sort(key=lambda entry: entry[1].st_mtime, reverse=True)
+    sessions = []
+    for path, stat in entries[:limit]:
+        sessions.append(
+            {
+                "id": path.stem,
+                "updated": stat.st_mtime,
+                "messages": SessionLog(path.stem, root).count(),
+                "size": stat.st_size,
+                "preview": _first_prompt(path),
+            }
+        )
+    return sessions
@@ -0,0 +1,286 @@
+import atexit
+import codecs
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Callable, Optional
+
+# Bytes of output kept per command; older output is dropped
+RING_BUFFER_BYTES = 1024 * 1024
+# Seconds between SIGTERM and SIGKILL when stopping a command
+KILL_GRACE = 2.0
+
+# Commands run under bash in their own process group. Windows has neither,
+# so there they run one-shot in the system shell, and cd and environment
+# changes don't carry over to the next command
+POSIX = os.name != "nt"
+
+# Runs one command; the EXIT trap records cwd and environment (NUL
+# separated) so the next command starts where this one left off
+COMMAND_SCRIPT = r"""
+trap '__agent_status=$?; { printf "%s\0" "$PWD"; env -0; } > "$GROQ_AGENT_STATE" 2>/dev/null; exit $__agent_status' EXIT
+eval "$GROQ_AGENT_CMD"
+"""
+
+
+class RingBuffer:
+    """Most recent bytes of a stream, addressed by absolute offsets"""
+
+    def __init__(self, max_bytes: int = RING_BUFFER_BYTES):
+        self.max_bytes = max_bytes
+        self.total = 0
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def start(self) -> int:
+        """Offset of the oldest byte still held"""
+        return self.total - self._size
+
+    def write(self, data: bytes):
+        with self._lock:
+            self._chunks.append(data)
+            self._size += len(data)
+            self.total += len(data)
+            while self._size - len(self._chunks[0]) >= self.max_bytes:
+                self._size -= len(self._chunks.popleft())
+            if self._size > self.max_bytes:
+                overflow = self._size - self.max_bytes
+                self._chunks[0] = self._chunks[0][overflow:]
+                self._size -= overflow
+
+    def read_since(self, offset: int = 0) -> tuple[str, int, int]:
+        """Text written since offset, the new offset and bytes lost to wrapping"""
+        with self._lock:
+            data = b"".join(self._chunks)
+            start = self.total - self._size
+            dropped = max(0, start - offset)
+            data = data[max(0, offset - start) :]
+            return data.decode("utf-8", errors="replace"), self.total, dropped
+
+
+class ShellJob:
+    """One command running in its own process group"""
+
+    def __init__(
+        self,
+        job_id: str,
+        command: str,
+        cwd: str,
+        env: dict[str, str],
+        state_file: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ):
+        self.job_id = job_id
+        self.command = command
+        self.output = RingBuffer()
+        self.on_output = on_output
+        self.state_file = state_file
+        self.polled = 0
+        args = command
+        if POSIX:
+            args = ["bash", "-c", COMMAND_SCRIPT]
+            env = {
+                **env,
+                "GROQ_AGENT_CMD": command,
+                "GROQ_AGENT_STATE": state_file or os.devnull,
+            }
+        self.process = subprocess.Popen(
+            args,
+            shell=not POSIX,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+            env=env,
+            start_new_session=POSIX,
+        )
+        self._reader = threading.Thread(
+            target=self._pump, name=f"shell-{job_id}", daemon=True
+        )
+        self._reader.start()
+
+    def _pump(self):
+        fd = self.process.stdout.fileno()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            self.output.write(data)
+            if self.on_output is not None:
+                self.on_output(decoder.decode(data))
+        self.process.stdout.close()
+
+    @property
+    def running(self) -> bool:
+        return self.process.poll() is None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the command and its output, True if it finished"""
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        self._reader.join(1.0)
+        return True
+
+    def kill(self):
+        """Stop the command and everything it started"""
+        if not self.running:
+            return
+        if not POSIX:
+            # /T takes the command's children down with the shell
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(self.process.pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            self.process.wait()
+            self._reader.join(1.0)
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(KILL_GRACE)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+        except ProcessLookupError:
+            pass
+        self._reader.join(1.0)
+
+    def result(self, offset: int = 0) -> dict[str, Any]:
+        """Output since offset plus exit status"""
+        text, end, dropped = self.output.read_since(offset)
+        if dropped:
+            text = f"[... {dropped} earlier bytes dropped ...]\n" + text
+        return {"output": text, "offset": end, "exit_code": self.process.returncode}
+
+
+class ShellSession:
+    """A shell whose working directory and environment persist across commands
+
+    Every command runs in a fresh bash process group, so it can be timed
+    out, killed or backgrounded on its own, while cd and export carry over
+    to the next foreground command.
+    """
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd or os.getcwd()
+        self.env = dict(os.environ)
+        self.jobs: dict[str, ShellJob] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        command: str,
+        background: bool = False,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> ShellJob:
+        """Start a command; only foreground commands update session state"""
+        with self._lock:
+            self._counter += 1
+            job_id = f"job-{self._counter}"
+        state_file = None
+        if not background and POSIX:
+            fd, state_file = tempfile.mkstemp(prefix="groq-agent-shell-")
+            os.close(fd)
+        job = ShellJob(job_id, command, self.cwd, self.env, state_file, on_output)
+        if background:
+            self.jobs[job_id] = job
+        return job
+
+    def finish(self, job: ShellJob):
+        """Adopt the cwd and environment a foreground command ended with"""
+        if not job.state_file:
+            return
+        try:
+            with open(job.state_file, "rb") as f:
+                fields = f.read().decode("utf-8", errors="replace").split("\0")
+        except OSError:
+            return
+        finally:
+            try:
+                os.unlink(job.state_file)
+            except OSError:
+                pass
+        if len(fields) < 2 or not os.path.isdir(fields[0]):
+            return
+        self.cwd = fields[0]
+        env = {}
+        for field in fields[1:]:
+            key, sep, value = field.partition("=")
+            if sep and not key.startswith(("GROQ_AGENT_", "BASH_FUNC_")) and key not in (
+                "_",
+                "SHLVL",
+            ):
+                env[key] = value
+        self.env = env
+
+    def run(
+        self,
+        command: str,
+        timeout: float,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> dict[str, Any]:
+        """Run a foreground command to completion or timeout"""
+        job = self.start(command, on_output=on_output)
+        finished = job.wait(timeout)
+        if not finished:
+            job.kill()
+        self.finish(job)
+        return {**job.result(), "timed_out": not finished, "cwd": self.cwd}
+
+    def poll(self, job_id: str, wait: float = 0, kill: bool = False) -> dict[str, Any]:
+        """New output and status of a background command"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"success": False, "error": f"Unknown job: {job_id}"}
+        if kill:
+            job.kill()
+        running = not job.wait(max(0.0, wait))
+        result = job.result(job.polled)
+        job.polled = result.pop("offset")
+        if not running:
+            del self.jobs[job_id]
+        return {"success": True, "job_id": job_id, "running": running, **result}
+
+    def kill_all(self):
+        """Stop every background command"""
+        for job in list(self.jobs.values()):
+            job.kill()
+        self.jobs.clear()
+
+
+_sessions: dict[str, ShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_shell_session(session: str = "default") -> ShellSession:
+    """Shell of a tool session, started on first use"""
+    with _sessions_lock:
+        if not _sessions:
+            atexit.register(_kill_all)
+        shell = _sessions.get(session)
+        if shell is None:
+            shell = _sessions[session] = ShellSession()
+        return shell
+
+
+def close_shell_session(session: str = "default"):
+    """Stop a tool session's background commands and forget its state"""
+    with _sessions_lock:
+        shell = _sessions.pop(session, None)
+    if shell is not None:
+        shell.kill_all()
+
+
+def _kill_all():
+    for shell in list(_sessions.values()):
+        shell.kill_all()
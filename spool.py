@@ -0,0 +1,195 @@
+import json
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+from config import CONFIG_DIR
+
+SPOOL_DIR = CONFIG_DIR / "spool"
+# Results larger than this many characters are spilled to disk
+MAX_INLINE_CHARS = 8000
+# Characters of head and tail kept inline for a spilled result
+PREVIEW_CHARS = 1500
+# String fields up to this long (cursors, paths, errors) stay inline when a
+# whole result is spilled
+SMALL_FIELD_CHARS = 200
+# Spool directories of sessions idle for longer than this are removed
+SPOOL_TTL_SECONDS = 24 * 3600
+
+HANDLE_PATTERN = re.compile(r"^out-\d{4,}$")
+
+
+class OutputSpool:
+    """Session-scoped disk store for tool outputs too large to send inline"""
+
+    def __init__(
+        self,
+        root: Path = SPOOL_DIR,
+        session_id: Optional[str] = None,
+        max_inline: int = MAX_INLINE_CHARS,
+        preview: int = PREVIEW_CHARS,
+    ):
+        self.root = root
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.session_dir = root / self.session_id
+        self.max_inline = max_inline
+        self.preview = preview
+        self._counter = 0
+        # Read-only tools spill from several threads at once
+        self._lock = threading.Lock()
+
+    def _prepare(self):
+        """Create the session directory and prune stale sessions"""
+        if self.session_dir.exists():
+            return
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        cutoff = time.time() - SPOOL_TTL_SECONDS
+        for entry in self.root.iterdir():
+            try:
+                if entry != self.session_dir and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry, ignore_errors=True)
+            except OSError:
+                pass
+
+    def store(self, text: str) -> str:
+        """Write text to the spool and return its handle"""
+        with self._lock:
+            handle = self._reserve()
+        (self.session_dir / handle).write_text(text, encoding="utf-8")
+        return handle
+
+    def _reserve(self) -> str:
+        """Next handle; called with the lock held"""
+        self._prepare()
+        self._counter += 1
+        return f"out-{self._counter:04d}"
+
+    def spill(self, result: dict[str, Any]) -> str:
+        """Serialize a tool result, moving oversized content to the spool
+
+        The largest string field (file content, command output) is written
+        to disk raw and replaced by its head and tail plus a handle the model
+        can pass to read_output. If that still leaves the result too large,
+        or its bulk isn't a single string, the whole result is spilled and
+        only its small scalar fields (success, exit_code, cursors) stay inline.
+        """
+        text = json.dumps(result)
+        if len(text) <= self.max_inline:
+            return text
+        preview = min(self.preview, self.max_inline // 4)
+        strings = [
+            (k, v) for k, v in result.items() if isinstance(v, str) and len(v) > 2 * preview
+        ]
+        if strings:
+            key, value = max(strings, key=lambda item: len(item[1]))
+            spilled = self._spilled(value, {**result, key: None}, preview)
+            if spilled is not None:
+                return spilled
+        small = {
+            k: v
+            for k, v in result.items()
+            if v is None
+            or isinstance(v, (bool, int, float))
+            or (isinstance(v, str) and len(v) <= SMALL_FIELD_CHARS)
+        }
+        whole = json.dumps(result, indent=1)
+        return self._spilled(whole, small, preview) or self._spilled(
+            whole, {"success": result.get("success", True)}, preview // 4, force=True
+        )
+
+    def _spilled(
+        self, text: str, inline: dict[str, Any], preview: int, force: bool = False
+    ) -> Optional[str]:
+        """Spill text next to the inline fields, or None if that's still too large"""
+        with self._lock:
+            handle = f"out-{self._counter + 1:04d}"
+            spilled = json.dumps(
+                {
+                    **inline,
+                    "spilled": True,
+                    "handle": handle,
+                    "path": str(self.session_dir / handle),
+                    "total_bytes": len(text.encode("utf-8")),
+                    "head": text[:preview],
+                    "tail": text[-preview:],
+                    "hint": "Output too large to show in full. Use read_output "
+                    "with this handle and a byte offset to page through it.",
+                }
+            )
+            if len(spilled) > self.max_inline and not force:
+                return None
+            # Taken only once the result fits, under the lock so concurrent
+            # spills can't be told the same handle
+            self._reserve()
+        (self.session_dir / handle).write_text(text, encoding="utf-8")
+        return spilled
+
+    def read(self, handle: str, offset: int = 0, limit: int = 4000) -> dict[str, Any]:
+        """Read a byte range of a spilled output"""
+        if not HANDLE_PATTERN.match(handle):
+            return {"success": False, "error": f"Invalid handle: {handle}"}
+        path = self.session_dir / handle
+        if not path.is_file():
+            return {"success": False, "error": f"Unknown handle: {handle}"}
+        offset = max(0, offset)
+        limit = max(1, min(limit, self.max_inline))
+        total = path.stat().st_size
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(limit)
+        # Keep multi-byte characters whole: skip a split lead
+        while data and 0x80 <= data[0] < 0xC0:
+            data = data[1:]
+            offset += 1
+        while True:
+            page = self._page(data, offset, total)
+            # JSON escapes can make a page several times its byte size; it
+            # must fit inline, or reading it would spill it again
+            size = len(json.dumps(page))
+            if size <= self.max_inline or len(data) <= 1:
+                return page
+            data = data[: max(1, len(data) * self.max_inline // size - 1)]
+
+    @staticmethod
+    def _page(data: bytes, offset: int, total: int) -> dict[str, Any]:
+        """read() result of a byte range, dropping a split trailing character"""
+        try:
+            content = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            data = data[: e.start]
+            content = data.decode("utf-8", errors="replace")
+        end = offset + len(data)
+        return {
+            "success": True,
+            "content": content,
+            "offset": offset,
+            "next_offset": end if end < total else None,
+            "total_bytes": total,
+        }
+
+
+_spools: dict[str, OutputSpool] = {}
+_spools_lock = threading.Lock()
+
+
+def get_spool(session: str = "default") -> OutputSpool:
+    """Spool of a tool session"""
+    with _spools_lock:
+        spool = _spools.get(session)
+        if spool is None:
+            # The default session's directory is unique to the process
+            spool = _spools[session] = OutputSpool(
+                session_id=None if session == "default" else session
+            )
+        return spool
+
+
+def close_spool(session: str = "default"):
+    """Delete a tool session's spilled outputs"""
+    with _spools_lock:
+        spool = _spools.pop(session, None)
+    if spool is not None:
+        shutil.rmtree(spool.session_dir, ignore_errors=True)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Check main.py cold-start import time and lazily loaded modules
+
+Runs each command under `python -X importtime` a few times and fails
+(exit 1) when it imports a module the command should not need. Import
+times depend on the machine and its load, so the fastest run is only
+compared with a baseline recorded on the same machine; without one,
+commands over their rough budget are reported but don't fail. Run it
+before and after changing imports:
+
+    python startup_check.py --out startup.json       # before
+    python startup_check.py --baseline startup.json  # after
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+MAIN = Path(__file__).parent / "main.py"
+RUNS = 5
+# Slowdown versus the baseline that fails the check: a fraction plus a
+# fixed allowance, since short imports vary by several ms between runs
+REGRESSION_THRESHOLD = 0.25
+REGRESSION_SLACK_MS = 15
+
+# (arguments, rough import budget in ms, modules that must not be imported)
+CASES = [
+    (["--help"], 100, {"rich", "groq", "keyring", "agent", "tools", "config"}),
+    (["chat", "--help"], 100, {"rich", "groq", "keyring", "agent", "tools"}),
+    (["status"], 200, {"groq", "keyring", "agent", "tools"}),
+    (
+        ["chat", "-q", "--base-url", "{url}", "hi"],
+        900,
+        {"keyring", "rich.markdown", "local_server"},
+    ),
+]
+
+
+def measure(args: list[str], env: dict[str, str]) -> tuple[float, set[str]]:
+    """Total import time in ms and the modules imported by one run"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN), *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        modules.add(name.strip())
+        # Only top-level imports; nested ones are part of their parent
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--baseline", help="Fail on import time regressions versus FILE")
+    parser.add_argument("--out", help="Write the measured import times to FILE")
+    options = parser.parse_args()
+    baseline = {}
+    if options.baseline:
+        with open(options.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    from local_server import ServerConfig, start_server
+
+    server = start_server(ServerConfig(ttft=0, tokens_per_sec=0))
+    env = {**os.environ, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "startup-check")}
+    env.pop("GROQ_BASE_URL", None)
+    failed = False
+    results = {}
+    for args, budget, forbidden in CASES:
+        name = " ".join(args)
+        args = [arg.format(url=server.url) for arg in args]
+        best, modules = min(measure(args, env) for _ in range(RUNS))
+        results[name] = round(best, 1)
+        loaded = sorted(
+            module
+            for module in modules
+            if module in forbidden or module.split(".")[0] in forbidden
+        )
+        if name in baseline:
+            limit = baseline[name] * (1 + REGRESSION_THRESHOLD) + REGRESSION_SLACK_MS
+            note = f"baseline {baseline[name]:.1f} ms"
+            slow = regressed = best > limit
+        else:
+            note = f"budget {budget} ms"
+            slow, regressed = best > budget, False
+        status = "FAIL" if loaded or regressed else "slow" if slow else "ok  "
+        failed |= bool(loaded or regressed)
+        print(f"{status} main.py {' '.join(args):<45} {best:7.1f} ms ({note})")
+        if loaded:
+            print(f"     should not import: {', '.join(loaded)}")
+    server.shutdown()
+    if options.out:
+        with open(options.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from config import CONFIG_DIR
+from walker import walk
+
+INDEX_DIR = CONFIG_DIR / "index"
+# Below this many changed files parsing inline beats starting workers
+POOL_THRESHOLD = 64
+# Seconds before a lookup re-checks files for changes
+REFRESH_INTERVAL = 10.0
+INDEX_VERSION = 1
+
+
+def _collect(nodes, parent: Optional[str], parent_kind: str, symbols: list[dict]):
+    for node in nodes:
+        if isinstance(node, ast.ClassDef):
+            kind = "class"
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = "method" if parent_kind == "class" else "function"
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            module = getattr(node, "module", None) or ""
+            for alias in node.names:
+                symbols.append(
+                    {
+                        "name": alias.asname or alias.name,
+                        "kind": "import",
+                        "line": node.lineno,
+                        "end_line": node.end_lineno,
+                        "qualname": f"{module}.{alias.name}" if module else alias.name,
+                    }
+                )
+            continue
+        else:
+            continue
+        qualname = f"{parent}.{node.name}" if parent else node.name
+        symbols.append(
+            {
+                "name": node.name,
+                "kind": kind,
+                "line": node.lineno,
+                "end_line": node.end_lineno,
+                "qualname": qualname,
+            }
+        )
+        _collect(node.body, qualname, kind, symbols)
+
+
+def parse_symbols(path: str) -> tuple[str, Optional[list[dict]]]:
+    """Symbols defined in a Python file, or None if it does not parse"""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return path, None
+    symbols: list[dict] = []
+    _collect(tree.body, None, "module", symbols)
+    return path, symbols
+
+
+# Run by each worker: parse the paths given on stdin, one per line, and
+# write their symbols as one JSON list
+WORKER_SOURCE = r"""
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from symbols import parse_symbols
+paths = sys.stdin.read().splitlines()
+json.dump([parse_symbols(path) for path in paths], sys.stdout)
+"""
+
+
+def _parse_in_workers(paths: list[str]) -> Optional[list]:
+    """parse_symbols over paths in worker processes, None if they fail
+
+    Workers are fresh interpreters rather than forks or multiprocessing
+    children: the caller may have threads running, which a fork copies
+    mid-use, and multiprocessing's spawn re-imports the caller's __main__.
+    """
+    count = min(os.cpu_count() or 1, 8)
+    if count < 2:
+        return None
+    here = os.path.dirname(os.path.abspath(__file__))
+    workers = []
+    try:
+        for index in range(count):
+            process = subprocess.Popen(
+                [sys.executable, "-c", WORKER_SOURCE, here],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            workers.append(process)
+        # Every worker gets its paths before any output is read, so they
+        # parse at the same time; a worker reads all input before writing
+        for index, process in enumerate(workers):
+            process.stdin.write("\n".join(paths[index::count]).encode())
+            process.stdin.close()
+        parsed = []
+        for process in workers:
+            output = process.stdout.read()
+            if process.wait():
+                return None
+            parsed.extend(json.loads(output))
+        return parsed
+    except (OSError, ValueError):
+        return None
+    finally:
+        for process in workers:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdin.close()
+            process.stdout.close()
+
+
+class SymbolIndex:
+    """Persistent index of classes, functions, methods and imports in Python files
+
+    Files are parsed with ast, in a process pool for large batches, and
+    only re-parsed when their mtime or size changes. Nothing is walked or
+    parsed until the first lookup.
+    """
+
+    def __init__(self, root: str = "."):
+        self.root = Path(root).resolve()
+        digest = hashlib.sha1(str(self.root).encode()).hexdigest()[:16]
+        self.path = INDEX_DIR / f"{digest}.symbols.json"
+        self.files: dict[str, dict[str, Any]] = {}
+        self.last_refresh: Optional[float] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(temp, self.path)
+
+    def refresh(self) -> int:
+        """Re-parse changed Python files, returning how many changed"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            seen = set()
+            changed: dict[str, tuple[int, int]] = {}
+            for rel, entry, is_dir in walk(str(self.root)):
+                if is_dir or not rel.endswith(".py"):
+                    continue
+                seen.add(rel)
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                known = self.files.get(rel)
+                if not known or (known["mtime"], known["size"]) != (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                ):
+                    changed[rel] = (stat.st_mtime_ns, stat.st_size)
+            removed = set(self.files) - seen
+
+            rels = {str(self.root / rel): rel for rel in changed}
+            paths = list(rels)
+            parsed = None
+            if len(paths) >= POOL_THRESHOLD:
+                parsed = _parse_in_workers(paths)
+            if parsed is None:
+                parsed = [parse_symbols(path) for path in paths]
+
+            for path, symbols in parsed:
+                rel = rels[path]
+                mtime, size = changed[rel]
+                self.files[rel] = {"mtime": mtime, "size": size, "symbols": symbols or []}
+            for rel in removed:
+                del self.files[rel]
+            if changed or removed:
+                self._save()
+            self.last_refresh = time.monotonic()
+            return len(changed) + len(removed)
+
+    def ensure_fresh(self):
+        """Build the index on first use, then re-check files if due"""
+        if (
+            self.last_refresh is None
+            or time.monotonic() - self.last_refresh >= REFRESH_INTERVAL
+        ):
+            self.refresh()
+
+    def mark_stale(self):
+        """Re-check files on the next lookup, e.g. after a tool wrote one"""
+        if self.last_refresh is not None:
+            self.last_refresh -= REFRESH_INTERVAL
+
+    def find(self, name: str, kind: Optional[str] = None, limit: int = 50) -> list[dict]:
+        """Definitions whose name or qualified name matches
+
+        Exact matches are returned when there are any; otherwise
+        case-insensitive substring matches.
+        """
+        self.ensure_fresh()
+        exact, partial = [], []
+        needle = name.lower()
+        for rel, info in sorted(self.files.items()):
+            for symbol in info["symbols"]:
+                if kind and symbol["kind"] != kind:
+                    continue
+                if symbol["name"] == name or symbol["qualname"] == name:
+                    exact.append({"file": rel, **symbol})
+                elif needle in symbol["qualname"].lower():
+                    partial.append({"file": rel, **symbol})
+        return (exact or partial)[:limit]
+
+    def symbols_in(self, file_path: str) -> Optional[list[dict]]:
+        """Symbols of one file in source order, or None if it does not parse
+
+        Files the index doesn't hold yet, such as ones in ignored
+        directories, are parsed directly.
+        """
+        self.ensure_fresh()
+        try:
+            rel = str(Path(file_path).resolve().relative_to(self.root))
+        except ValueError:
+            _, symbols = parse_symbols(file_path)
+            return symbols
+        info = self.files.get(rel)
+        if info is None:
+            _, symbols = parse_symbols(str(self.root / rel))
+            return None if symbols is None else sorted(symbols, key=lambda s: s["line"])
+        stat = (self.root / rel).stat()
+        if (info["mtime"], info["size"]) != (stat.st_mtime_ns, stat.st_size):
+            _, symbols = parse_symbols(str(self.root / rel))
+            info = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "symbols": symbols or []}
+            with self._lock:
+                self.files[rel] = info
+        return sorted(info["symbols"], key=lambda symbol: symbol["line"])
+
+
+_indexes: dict[Path, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: str = ".") -> SymbolIndex:
+    """Symbol index for root, shared within the process"""
+    key = Path(root).resolve()
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SymbolIndex(str(key))
+        return _indexes[key]
+
+
+def mark_symbol_indexes_stale():
+    """Have every symbol index re-check files on its next lookup"""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.mark_stale()
@@ -0,0 +1,54 @@
+import time
+from history import ConversationHistory, estimate_message_tokens
+
+
+def make_history(turns: int) -> ConversationHistory:
+    history = ConversationHistory(token_budget=10**9)
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"question {turn:05d} " + "x" * 40})
+        history.append({"role": "assistant", "content": f"answer {turn:05d} " + "y" * 40})
+    return history
+
+
+def turn_tokens(history: ConversationHistory) -> int:
+    return sum(estimate_message_tokens(m) for m in list(history)[:2])
+
+
+def first_question(history: ConversationHistory) -> str:
+    return next(m["content"] for m in history if m["content"].startswith("question"))
+
+
+def test_compact_folds_the_oldest_turns_needed():
+    history = make_history(turns=10)
+    history.token_budget = history.total_tokens - 3 * turn_tokens(history) + 1
+    history.compact()
+
+    assert history[0]["content"].startswith("[Summary of earlier conversation]")
+    assert "question 00002" in history[0]["content"]
+    assert first_question(history).startswith("question 00003 ")
+
+
+def test_compact_again_counts_the_summary():
+    history = make_history(turns=10)
+    per_turn = turn_tokens(history)
+    history.token_budget = history.total_tokens - 3 * per_turn + 1
+    history.compact()
+    summary = estimate_message_tokens(history[0])
+    history.token_budget = history.total_tokens - summary - per_turn + 1
+    history.compact()
+
+    # The old summary and one more turn are folded into a new summary
+    assert "question 00003" in history[0]["content"]
+    assert first_question(history).startswith("question 00004 ")
+    assert history.total_tokens == sum(estimate_message_tokens(m) for m in history)
+
+
+def test_compact_is_linear_in_history_length():
+    # Summing the token prefix for every candidate turn took seconds here
+    history = make_history(turns=20_000)
+    history.token_budget = 1_000
+    started = time.perf_counter()
+    history.compact()
+    assert time.perf_counter() - started < 1.0
+    summary = estimate_message_tokens(history[0])
+    assert history.total_tokens - summary <= history.token_budget
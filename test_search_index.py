@@ -0,0 +1,30 @@
+import search_index
+from search_index import TrigramIndex
+
+
+def make_index(tmp_path, monkeypatch) -> TrigramIndex:
+    monkeypatch.setattr(search_index, "INDEX_DIR", tmp_path / "index")
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "old.py").write_text("x = 1\n")
+    index = TrigramIndex(str(project))
+    assert index.search("x = 1")["matches"]
+    return index
+
+
+def test_a_file_written_after_a_search_is_found(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    (index.root / "new.py").write_text("class Fresh:\n    pass\n")
+    index.mark_stale()
+
+    assert [match["file"] for match in index.search("class Fresh")["matches"]] == ["new.py"]
+
+
+def test_context_stops_at_the_last_line(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    (index.root / "new.py").write_text("import os\n\nclass Fresh:\n")
+    index.mark_stale()
+
+    match = index.search("class Fresh", context=2)["matches"][0]
+    assert match["context"] == "1- import os\n2- \n3: class Fresh:"
+    assert [m["line"] for m in index.search("^", path_glob="new.py")["matches"]] == [1, 2, 3]
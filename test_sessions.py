@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import json
+import agent
+from agent import CANCELLED_NOTE, AsyncCodingAgent
+from sessions import SessionLog
+
+
+def tool_call(call_id: str) -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": "read_file", "arguments": json.dumps({"path": "a.py"})},
+    }
+
+
+def resume(tmp_path, monkeypatch, messages: list[dict]) -> list[dict]:
+    monkeypatch.setattr(agent, "SessionLog", functools.partial(SessionLog, root=tmp_path))
+    monkeypatch.setattr(
+        agent, "find_session", lambda ref: ref if (tmp_path / f"{ref}.jsonl").exists() else None
+    )
+    log = SessionLog("crashed", root=tmp_path)
+    for message in messages:
+        log.append(message)
+    log.close()
+
+    async def replay() -> list[dict]:
+        # The API client is bound to the running loop
+        coding_agent = AsyncCodingAgent("test-key", routing=False)
+        try:
+            assert coding_agent.resume_session("crashed")["success"]
+            return coding_agent.build_request()["messages"][1:]
+        finally:
+            coding_agent.close()
+
+    return asyncio.run(replay())
+
+
+def test_resume_answers_tool_calls_cut_off_by_a_crash(tmp_path, monkeypatch):
+    messages = resume(
+        tmp_path,
+        monkeypatch,
+        [
+            {"role": "user", "content": "read a.py and b.py"},
+            {"role": "assistant", "content": "", "tool_calls": [tool_call("call_1"), tool_call("call_2")]},
+            {"role": "tool", "tool_call_id": "call_1", "name": "read_file", "content": "{}"},
+        ],
+    )
+
+    assert [m["role"] for m in messages] == ["user", "assistant", "tool", "tool"]
+    assert messages[2]["content"] == "{}"
+    assert messages[3]["tool_call_id"] == "call_2"
+    assert CANCELLED_NOTE in messages[3]["content"]
+
+
+def test_resume_answers_tool_calls_before_the_next_turn(tmp_path, monkeypatch):
+    messages = resume(
+        tmp_path,
+        monkeypatch,
+        [
+            {"role": "user", "content": "read a.py"},
+            {"role": "assistant", "content": "", "tool_calls": [tool_call("call_1")]},
+            {"role": "user", "content": "never mind"},
+            {"role": "assistant", "content": "OK"},
+        ],
+    )
+
+    assert [m["role"] for m in messages] == ["user", "assistant", "tool", "user", "assistant"]
+    assert messages[2]["tool_call_id"] == "call_1"
@@ -0,0 +1,50 @@
+import json
+import threading
+from spool import OutputSpool
+
+
+def make_spool(tmp_path) -> OutputSpool:
+    return OutputSpool(root=tmp_path, session_id="test")
+
+
+def test_concurrent_spills_get_their_own_handles(tmp_path):
+    spool = make_spool(tmp_path)
+    results = [None] * 8
+    start = threading.Barrier(len(results))
+
+    def spill(index: int):
+        start.wait()
+        results[index] = json.loads(spool.spill({"success": True, "content": str(index) * 20_000}))
+
+    threads = [threading.Thread(target=spill, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({result["handle"] for result in results}) == len(results)
+    for index, result in enumerate(results):
+        assert spool.read(result["handle"], 0, 10)["content"] == str(index) * 10
+
+
+def test_a_full_page_fits_inline(tmp_path):
+    spool = make_spool(tmp_path)
+    handle = spool.store("x" * 20_000)
+    page = spool.read(handle, 0, spool.max_inline)
+
+    assert not json.loads(spool.spill(page)).get("spilled")
+    assert page["next_offset"] == len(page["content"])
+
+
+def test_pages_of_escaped_text_fit_inline(tmp_path):
+    spool = make_spool(tmp_path)
+    text = "\x01\n\"é€" * 5_000
+    handle = spool.store(text)
+    offset, pages = 0, []
+    while offset is not None:
+        page = spool.read(handle, offset, spool.max_inline)
+        assert len(json.dumps(page)) <= spool.max_inline
+        pages.append(page["content"])
+        offset = page["next_offset"]
+
+    assert "".join(pages) == text
@@ -0,0 +1,15 @@
+import os
+import pytest
+from startup_check import CASES, measure
+
+# The quick-query case needs the stand-in server; startup_check.py runs it
+COMMANDS = [(args, forbidden) for args, _, forbidden in CASES if "{url}" not in args]
+
+
+@pytest.mark.parametrize("args, forbidden", COMMANDS, ids=[" ".join(a) for a, _ in COMMANDS])
+def test_command_does_not_import_unneeded_modules(args, forbidden, tmp_path):
+    env = {**os.environ, "HOME": str(tmp_path), "GROQ_API_KEY": "startup-check"}
+    _, modules = measure(args, env)
+
+    assert modules
+    assert sorted(m for m in modules if m.split(".")[0] in forbidden or m in forbidden) == []
@@ -0,0 +1,34 @@
+import symbols
+from symbols import SymbolIndex
+
+
+def make_index(tmp_path, monkeypatch) -> SymbolIndex:
+    monkeypatch.setattr(symbols, "INDEX_DIR", tmp_path / "index")
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "old.py").write_text("class Old:\n    pass\n")
+    index = SymbolIndex(str(project))
+    assert index.find("Old")
+    return index
+
+
+def test_a_file_written_after_a_lookup_is_found(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    (index.root / "new.py").write_text("class Fresh:\n    def go(self):\n        pass\n")
+
+    assert [symbol["qualname"] for symbol in index.symbols_in(str(index.root / "new.py"))] == [
+        "Fresh",
+        "Fresh.go",
+    ]
+    index.mark_stale()
+    assert [symbol["file"] for symbol in index.find("Fresh")] == ["new.py"]
+
+
+def test_files_in_ignored_directories_are_parsed_directly(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    (index.root / "node_modules").mkdir()
+    (index.root / "node_modules" / "vendored.py").write_text("def helper():\n    pass\n")
+
+    symbols_in = index.symbols_in(str(index.root / "node_modules" / "vendored.py"))
+    assert [symbol["name"] for symbol in symbols_in] == ["helper"]
+    assert index.find("helper") == []
@@ -0,0 +1,380 @@
+import asyncio
+import importlib
+import inspect
+import json
+import os
+import sys
+import types
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, Optional, Union
+from rich.console import Console
+from config import CONFIG_DIR, atomic_write
+
+console = Console()
+
+# Entry point group plugin packages register their tool modules under
+PLUGIN_GROUP = "groq_agent.tools"
+PLUGIN_CACHE_FILE = CONFIG_DIR / "tool_plugins.json"
+# Set to 0 to skip entry point plugins
+PLUGINS_ENABLED = os.getenv("GROQ_AGENT_PLUGINS", "1") != "0"
+
+# X | Y annotations (Python 3.10+) have their own origin
+_UNION_TYPES = tuple(t for t in (Union, getattr(types, "UnionType", None)) if t)
+
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    dict: "object",
+    list: "array",
+}
+
+
+def json_schema(hint: Any) -> dict[str, Any]:
+    """JSON schema of a parameter type hint"""
+    origin = typing.get_origin(hint)
+    if origin in _UNION_TYPES:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        return json_schema(args[0]) if len(args) == 1 else {}
+    if origin is Literal:
+        values = list(typing.get_args(hint))
+        return {**json_schema(type(values[0])), "enum": values}
+    if origin is list:
+        args = typing.get_args(hint)
+        return {"type": "array", **({"items": json_schema(args[0])} if args else {})}
+    if origin is dict:
+        return {"type": "object"}
+    if hint in _JSON_TYPES:
+        return {"type": _JSON_TYPES[hint]}
+    return {"type": "string"}
+
+
+@dataclass
+class ToolSpec:
+    """A registered tool; func is None until a lazy plugin is imported"""
+
+    name: str
+    func: Optional[Callable[..., Any]] = None
+    description: str = ""
+    params: dict[str, str] = field(default_factory=dict)
+    read_only: bool = False
+    async_func: Optional[Callable[..., Any]] = None
+    # Entry point the tool came from, for loading it on first call
+    plugin: Optional[str] = None
+    definition: Optional[dict] = None
+    # Parameter names and required ones, taken from the signature by build()
+    arg_names: Optional[frozenset] = None
+    required: tuple = ()
+
+    def build(self):
+        """Generate the API definition from the signature and type hints"""
+        signature = inspect.signature(self.func)
+        hints = typing.get_type_hints(self.func)
+        properties = {}
+        required = []
+        for name, parameter in signature.parameters.items():
+            schema = json_schema(hints.get(name, str))
+            if name in self.params:
+                schema["description"] = self.params[name]
+            properties[name] = schema
+            if parameter.default is inspect.Parameter.empty:
+                required.append(name)
+        self.arg_names = frozenset(properties)
+        self.required = tuple(required)
+        doc = inspect.getdoc(self.func) or ""
+        self.definition = {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description or doc.split("\n\n")[0].replace("\n", " "),
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": required,
+                },
+            },
+        }
+
+
+class ToolRegistry:
+    """Tools the agent can call, keyed by name
+
+    Definitions are generated from type hints the first time they are
+    asked for and then reused for every request. Plugin tools come from
+    the groq_agent.tools entry point group; their definitions are cached
+    on disk, so a plugin module is only imported when one of its tools is
+    first called.
+    """
+
+    def __init__(self):
+        self._tools: dict[str, ToolSpec] = {}
+        self._definitions: Optional[list[dict]] = None
+        self._plugins_loaded = not PLUGINS_ENABLED
+        # Entry point whose module is being imported, if any
+        self._loading: Optional[str] = None
+
+    def tool(
+        self,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        params: Optional[dict[str, str]] = None,
+        read_only: bool = False,
+    ):
+        """Decorator registering a function as a tool
+
+        The description defaults to the docstring's first paragraph and
+        params maps argument names to descriptions. Tools are assumed to
+        have side effects unless read_only, which lets calls run
+        concurrently with other read-only calls.
+        """
+
+        def register(func: Callable[..., Any]) -> Callable[..., Any]:
+            tool_name = name or func.__name__
+            spec = self._tools.get(tool_name)
+            if (
+                spec is not None
+                and spec.func is None
+                and spec.plugin is not None
+                and spec.plugin == self._loading
+            ):
+                # A lazy plugin being imported; the cached definition may
+                # predate an edit to the plugin, so it is rebuilt
+                spec.func = func
+                spec.params = params or {}
+                spec.description = description or ""
+                spec.read_only = read_only
+                cached = spec.definition
+                spec.build()
+                if spec.definition != cached:
+                    self._definitions = None
+                return func
+            self._tools[tool_name] = ToolSpec(
+                name=tool_name,
+                func=func,
+                description=description or "",
+                params=params or {},
+                read_only=read_only,
+                async_func=spec.async_func if spec else None,
+                plugin=self._loading,
+            )
+            self._definitions = None
+            return func
+
+        return register
+
+    def tool_async(self, name: str):
+        """Decorator registering the async implementation of a tool"""
+
+        def register(func: Callable[..., Any]) -> Callable[..., Any]:
+            spec = self._tools.setdefault(name, ToolSpec(name=name))
+            spec.async_func = func
+            return func
+
+        return register
+
+    def _spec(self, name: str) -> Optional[ToolSpec]:
+        spec = self._tools.get(name)
+        if spec is None and not self._plugins_loaded:
+            self.load_plugins()
+            spec = self._tools.get(name)
+        if spec is not None and spec.func is None and spec.plugin:
+            self._import_plugin(spec.plugin)
+        if spec is None or spec.func is None:
+            return None
+        if spec.arg_names is None:
+            spec.build()
+        return spec
+
+    def definitions(self) -> list[dict]:
+        """API definitions of all tools, built once"""
+        if not self._plugins_loaded:
+            self.load_plugins()
+        if self._definitions is None:
+            for spec in self._tools.values():
+                if spec.definition is None and spec.func is not None:
+                    spec.build()
+            self._definitions = [
+                spec.definition for spec in self._tools.values() if spec.definition
+            ]
+        return self._definitions
+
+    def is_read_only(self, name: str) -> bool:
+        spec = self._tools.get(name)
+        return spec is not None and spec.read_only
+
+    def _arguments(self, spec: ToolSpec, tool_input: dict) -> dict[str, Any]:
+        missing = [name for name in spec.required if name not in tool_input]
+        if missing:
+            raise TypeError(f"Missing required argument: {', '.join(missing)}")
+        # Models sometimes add arguments a tool doesn't take
+        return {k: v for k, v in tool_input.items() if k in spec.arg_names}
+
+    def call(self, name: str, tool_input: dict) -> Any:
+        """Run a tool with the model's arguments"""
+        spec = self._spec(name)
+        if spec is None:
+            return {"success": False, "error": f"Unknown tool: {name}"}
+        return spec.func(**self._arguments(spec, tool_input))
+
+    async def acall(self, name: str, tool_input: dict) -> Any:
+        """Async call: a tool's async implementation, or its sync one in a thread"""
+        spec = self._spec(name)
+        if spec is None:
+            return {"success": False, "error": f"Unknown tool: {name}"}
+        arguments = self._arguments(spec, tool_input)
+        if spec.async_func is not None:
+            return await spec.async_func(**arguments)
+        return await asyncio.to_thread(spec.func, **arguments)
+
+    def has_async(self, name: str) -> bool:
+        spec = self._tools.get(name)
+        return spec is not None and spec.async_func is not None
+
+    def _import_plugin(self, key: str):
+        """Import an entry point's module, registering its tools"""
+        module, _, attr = key.split(":", 1)[1].partition(":")
+        self._loading = key
+        try:
+            loaded = importlib.import_module(module)
+            if attr:
+                # "module:register" names a function taking the registry
+                getattr(loaded, attr)(self)
+        finally:
+            self._loading = None
+
+    def load_plugins(self):
+        """Register tools of installed plugins, importing only uncached ones"""
+        self._plugins_loaded = True
+        try:
+            with open(PLUGIN_CACHE_FILE, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        site_stamp = _site_stamp()
+        entries = cache.get("entry_points") if cache.get("stamp") == site_stamp else None
+        if entries is None:
+            from importlib.metadata import entry_points
+
+            try:
+                found = entry_points(group=PLUGIN_GROUP)
+            except TypeError:  # Python < 3.10: a dict of groups, entries without dist
+                found = entry_points().get(PLUGIN_GROUP, [])
+            entries = []
+            for ep in found:
+                dist = getattr(ep, "dist", None)
+                entries.append(
+                    f"{dist.name if dist else ''}=={dist.version if dist else ''}:{ep.value}"
+                )
+        cached = cache.get("plugins", {})
+        plugins = {}
+        for key in entries:
+            stamp = _module_stamp(key.split(":", 1)[1].partition(":")[0])
+            entry = cached.get(key)
+            # Without a stamp an edit can't be noticed, so the plugin is imported
+            if stamp is not None and isinstance(entry, dict) and entry.get("stamp") == stamp:
+                tools = entry["tools"]
+                for tool in tools:
+                    definition = tool["definition"]
+                    name = definition["function"]["name"]
+                    if name not in self._tools:
+                        self._tools[name] = ToolSpec(
+                            name=name,
+                            read_only=tool["read_only"],
+                            plugin=key,
+                            definition=definition,
+                        )
+            else:
+                before = set(self._tools)
+                try:
+                    self._import_plugin(key)
+                except Exception as e:
+                    console.print(f"[yellow]Tool plugin {key} failed to load: {e}[/yellow]")
+                    continue
+                tools = []
+                for name in set(self._tools) - before:
+                    spec = self._tools[name]
+                    spec.build()
+                    tools.append({"definition": spec.definition, "read_only": spec.read_only})
+            plugins[key] = {"stamp": stamp, "tools": tools}
+        self._definitions = None
+        if entries != cache.get("entry_points") or plugins != cached:
+            try:
+                atomic_write(
+                    PLUGIN_CACHE_FILE,
+                    json.dumps(
+                        {"stamp": site_stamp, "entry_points": entries, "plugins": plugins}
+                    ),
+                )
+            except OSError:
+                pass
+
+
+def _site_stamp() -> dict[str, int]:
+    """Modification times of the package directories; installs change them"""
+    stamp = {}
+    for path in sys.path:
+        if path.endswith(("site-packages", "dist-packages")):
+            try:
+                stamp[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+    return stamp
+
+
+def _module_stamp(module: str) -> Optional[int]:
+    """Newest modification time of a module's source, found without importing it
+
+    Editable and in-tree plugins change without a reinstall, so their
+    cached definitions are keyed on this as well as on the version.
+    """
+    path = None
+    parts = module.split(".")
+    for entry in sys.path:
+        base = os.path.join(entry or ".", *parts)
+        if os.path.isfile(os.path.join(base, "__init__.py")):
+            path = base
+        elif os.path.isfile(base + ".py"):
+            path = base + ".py"
+        if path:
+            break
+    else:
+        # Import hooks, e.g. of editable installs; imports parent packages only
+        try:
+            import importlib.util
+
+            spec = importlib.util.find_spec(module)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None or not spec.origin or not os.path.exists(spec.origin):
+            return None
+        path = spec.origin
+        if os.path.basename(path) == "__init__.py":
+            path = os.path.dirname(path)
+    if not os.path.isdir(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    newest = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".py"):
+                try:
+                    newest = max(newest, os.stat(os.path.join(directory, name)).st_mtime_ns)
+                except OSError:
+                    pass
+    return newest
+
+
+_registry = ToolRegistry()
+
+
+def get_registry() -> ToolRegistry:
+    """Registry of the built-in tools and installed plugins"""
+    return _registry
+
+
+tool = _registry.tool
+tool_async = _registry.tool_async
@@ -1,32 +1,108 @@
 import os
+import signal
+import asyncio
+import contextvars
 import subprocess
 import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Literal, Optional
 from rich.console import Console
+from file_cache import get_file_cache
+from python_kernel import KERNELS_SUPPORTED, get_kernel_pool
+from search_index import get_index, mark_indexes_stale
+from shell import get_shell_session
+from spool import get_spool
+from symbols import get_symbol_index, mark_symbol_indexes_stale
+from tool_registry import get_registry, tool, tool_async
+from tracing import get_tracer
+from walker import list_page
 
 console = Console()
 
+# Upper bound for per-call timeouts requested by the model
+MAX_TIMEOUT = 600
+
+# Session of the running tool call; each agent runs its tools in its own
+# Python interpreter and shell
+_tool_session: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "tool_session", default="default"
+)
+
+
+def tool_session() -> str:
+    """Id of the session the current tool call belongs to"""
+    return _tool_session.get()
+
 
 class CodingTools:
     """Provides tools for the coding agent"""
 
     @staticmethod
-    def read_file(file_path: str) -> dict[str, Any]:
-        """Read contents of a file"""
+    @tool(
+        description="Read the contents of a file, or only a range of its lines",
+        params={
+            "file_path": "Path to the file to read",
+            "start_line": "First line to read, 1-based (default: 1)",
+            "end_line": "Last line to read, inclusive (default: end of file)",
+        },
+        read_only=True,
+    )
+    def read_file(
+        file_path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Read contents of a file, optionally only a 1-based line range"""
         try:
             path = Path(file_path)
             if not path.exists():
                 return {"success": False, "error": f"File not found: {file_path}"}
             if not path.is_file():
                 return {"success": False, "error": f"Not a file: {file_path}"}
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-            return {"success": True, "content": content}
+            with get_file_cache().open(path) as mapped:
+                if start_line is None and end_line is None:
+                    content = mapped.read_bytes(0, mapped.size)
+                    return {
+                        "success": True,
+                        "content": content.decode("utf-8", errors="replace"),
+                    }
+                total = mapped.line_count
+                if not total:
+                    return {"success": True, "content": "", "total_lines": 0}
+                start = max(1, int(start_line or 1))
+                end = min(total, int(end_line or total))
+                if start > total:
+                    return {
+                        "success": False,
+                        "error": f"start_line {start} is past the end of the file "
+                        f"({total} lines)",
+                    }
+                if end < start:
+                    return {
+                        "success": False,
+                        "error": f"end_line {end} is before start_line {start}",
+                    }
+                content = mapped.read_lines(start, end)
+            return {
+                "success": True,
+                "content": content.decode("utf-8", errors="replace"),
+                "start_line": start,
+                "end_line": end,
+                "total_lines": total,
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
+    @tool(
+        params={
+            "file_path": "Path to the file to write",
+            "content": "Content to write to the file",
+        },
+    )
     def write_file(file_path: str, content: str) -> dict[str, Any]:
         """Write content to a file"""
         try:
@@ -34,35 +110,161 @@ class CodingTools:
             path.parent.mkdir(parents=True, exist_ok=True)
             with open(path, "w", encoding="utf-8") as f:
                 f.write(content)
+            CodingTools._files_changed()
             return {"success": True, "message": f"File written: {file_path}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
-    def list_files(directory: str = ".") -> dict[str, Any]:
-        """List files in directory"""
+    @tool(
+        description="List files in a directory tree, skipping gitignored paths. "
+        "Rows are [path, type, size] with type f (file), d (directory) or l "
+        "(symlink). Pass next_cursor back as cursor to get the next page.",
+        params={
+            "directory": "Directory path (default: current directory)",
+            "pattern": "Glob on file names, or on relative paths if it contains "
+            "'/' (e.g. '*.py')",
+            "max_depth": "Maximum directory depth (1 = top level only)",
+            "cursor": "next_cursor from a previous page",
+            "limit": "Entries per page (default: 50)",
+        },
+        read_only=True,
+    )
+    def list_files(
+        directory: str = ".",
+        pattern: Optional[str] = None,
+        max_depth: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> dict[str, Any]:
+        """List files in directory, honoring .gitignore, one page at a time"""
         try:
             path = Path(directory)
             if not path.exists():
                 return {"success": False, "error": f"Directory not found: {directory}"}
-            files = [
-                str(f.relative_to(path))
-                for f in path.rglob("*")
-                if f.is_file() and not str(f.relative_to(path)).startswith(".")
-            ][:50]
-            return {"success": True, "files": files[:50]}
+            if not path.is_dir():
+                return {"success": False, "error": f"Not a directory: {directory}"}
+            page = list_page(
+                directory,
+                pattern=pattern,
+                max_depth=max_depth,
+                cursor=cursor,
+                limit=max(1, min(int(limit), 500)),
+            )
+            return {"success": True, "format": "[path, type, size]", **page}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
-    def execute_python(code: str) -> dict[str, Any]:
-        """Execute Python code safely"""
+    @tool(
+        description="Search file contents by regex or literal text using a fast "
+        "index. Returns file:line matches with context.",
+        params={
+            "pattern": "Python regular expression, or plain text if literal is true",
+            "path_glob": "Only search matching files, e.g. '*.py' or 'src/**/*.ts'",
+            "literal": "Treat pattern as plain text (default: false)",
+            "ignore_case": "Case-insensitive search (default: false)",
+            "context": "Lines of context around each match (default: 2)",
+            "directory": "Directory to search (default: current directory)",
+        },
+        read_only=True,
+    )
+    def search_code(
+        pattern: str,
+        path_glob: Optional[str] = None,
+        literal: bool = False,
+        ignore_case: bool = False,
+        context: int = 2,
+        directory: str = ".",
+    ) -> dict[str, Any]:
+        """Search code with the persistent trigram index"""
+        try:
+            if not Path(directory).is_dir():
+                return {"success": False, "error": f"Directory not found: {directory}"}
+            result = get_index(directory).search(
+                pattern,
+                path_glob=path_glob,
+                literal=bool(literal),
+                ignore_case=bool(ignore_case),
+                context=max(0, min(int(context), 10)),
+            )
+            return {"success": True, **result}
+        except re.error as e:
+            return {"success": False, "error": f"Invalid pattern: {e}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    @tool(
+        description="Find where a Python class, function, method or import is "
+        "defined. Returns file and line span, usable with read_file "
+        "start_line/end_line.",
+        params={
+            "name": "Symbol name or qualified name, e.g. 'CodingTools.read_file'",
+            "kind": "Only return symbols of this kind",
+            "directory": "Project directory (default: current directory)",
+        },
+        read_only=True,
+    )
+    def find_symbol(
+        name: str,
+        kind: Optional[Literal["class", "function", "method", "import"]] = None,
+        directory: str = ".",
+    ) -> dict[str, Any]:
+        """Locate Python classes, functions, methods or imports by name"""
+        try:
+            if not Path(directory).is_dir():
+                return {"success": False, "error": f"Directory not found: {directory}"}
+            symbols = get_symbol_index(directory).find(name, kind)
+            return {"success": True, "symbols": symbols}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    @tool(
+        description="List classes, functions, methods and imports of a Python "
+        "file with their line spans",
+        params={"file_path": "Path to the Python file"},
+        read_only=True,
+    )
+    def list_symbols(file_path: str) -> dict[str, Any]:
+        """List the symbols defined in a Python file with their line spans"""
+        try:
+            if not Path(file_path).is_file():
+                return {"success": False, "error": f"File not found: {file_path}"}
+            symbols = get_symbol_index(".").symbols_in(file_path)
+            if symbols is None:
+                return {"success": False, "error": f"Not a valid Python file: {file_path}"}
+            return {"success": True, "symbols": symbols}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    @tool(
+        description="Execute Python code in a persistent interpreter; variables "
+        "and imports carry over between calls and the value of a trailing "
+        "expression is printed",
+        params={
+            "code": "Python code to execute",
+            "timeout": "Timeout in seconds (default: 10)",
+            "fresh": "Run in a new, stateless interpreter instead (default: false)",
+        },
+    )
+    def execute_python(code: str, timeout: float = 10, fresh: bool = False) -> dict[str, Any]:
+        """Execute Python code in the session's persistent interpreter
+
+        With fresh=True, or where kernels aren't supported, the code runs in
+        a new interpreter that keeps no state.
+        """
+        timeout = max(1, min(float(timeout), MAX_TIMEOUT))
+        if not fresh and KERNELS_SUPPORTED:
+            return get_kernel_pool().execute(code, timeout, tool_session())
         try:
             result = subprocess.run(
                 ["python", "-c", code],
                 capture_output=True,
                 text=True,
-                timeout=10,
+                timeout=timeout,
             )
             return {
                 "success": True,
@@ -70,144 +272,328 @@ class CodingTools:
                 "error": result.stderr if result.stderr else None,
             }
         except subprocess.TimeoutExpired:
-            return {"success": False, "error": "Code execution timeout (10s)"}
+            return {"success": False, "error": f"Code execution timeout ({timeout:g}s)"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
-    def bash_command(command: str) -> dict[str, Any]:
-        """Execute bash command"""
+    def _stream_output(text: str):
+        """Echo command output to the console as it arrives"""
+        console.print(text, end="", style="dim", markup=False, highlight=False)
+
+    @staticmethod
+    @tool(
+        description="Execute bash command. The working directory and exported "
+        "variables persist between commands.",
+        params={
+            "command": "Bash command to execute",
+            "timeout": "Timeout in seconds (default: 10); raise it for builds and "
+            "test suites",
+            "background": "Start the command and return a job_id immediately "
+            "instead of waiting (default: false)",
+        },
+    )
+    def bash_command(
+        command: str, timeout: float = 10, background: bool = False
+    ) -> dict[str, Any]:
+        """Execute bash command in the persistent shell session"""
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
+            timeout = max(1, min(float(timeout), MAX_TIMEOUT))
+            session = get_shell_session(tool_session())
+            if background:
+                job = session.start(command, background=True)
+                return {
+                    "success": True,
+                    "job_id": job.job_id,
+                    "message": "Started in background; check it with poll_command",
+                }
+            result = session.run(command, timeout, on_output=CodingTools._stream_output)
+            return CodingTools._command_result(result, timeout)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _files_changed():
+        """Have code search and symbol lookups see files a tool may have written"""
+        mark_indexes_stale()
+        mark_symbol_indexes_stale()
+
+    @staticmethod
+    def _command_result(result: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """Shape a finished foreground command as a tool result"""
+        CodingTools._files_changed()
+        if result["timed_out"]:
             return {
-                "success": True,
-                "output": result.stdout,
-                "error": result.stderr if result.stderr else None,
+                "success": False,
+                "output": result["output"],
+                "error": f"Command timeout ({timeout:g}s); raise timeout or run it "
+                "with background=true",
             }
-        except subprocess.TimeoutExpired:
-            return {"success": False, "error": "Command timeout (10s)"}
+        return {
+            "success": True,
+            "output": result["output"],
+            "exit_code": result["exit_code"],
+            "cwd": result["cwd"],
+        }
+
+    @staticmethod
+    @tool(
+        description="Get new output and the status of a background command "
+        "started with bash_command",
+        params={
+            "job_id": "job_id returned by bash_command",
+            "wait": "Seconds to wait for the command to finish before returning "
+            "(default: 0)",
+            "kill": "Stop the command (default: false)",
+        },
+    )
+    def poll_command(job_id: str, wait: float = 0, kill: bool = False) -> dict[str, Any]:
+        """Get new output and status of a background command"""
+        try:
+            wait = max(0, min(float(wait), MAX_TIMEOUT))
+            result = get_shell_session(tool_session()).poll(job_id, wait, bool(kill))
+            CodingTools._files_changed()
+            return result
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    @tool(
+        description="Page through a tool output that was too large to return inline",
+        params={
+            "handle": "Handle of the spilled output",
+            "offset": "Byte offset to start reading at (default: 0)",
+            "limit": "Maximum bytes to return (default: 4000)",
+        },
+        read_only=True,
+    )
+    def read_output(handle: str, offset: int = 0, limit: int = 4000) -> dict[str, Any]:
+        """Read part of a tool output spilled to the session spool"""
+        try:
+            return get_spool(tool_session()).read(handle, int(offset), int(limit))
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    async def _communicate(
+        process: asyncio.subprocess.Process, timeout: float
+    ) -> tuple[str, str]:
+        """Wait for a subprocess, killing it on timeout or cancellation"""
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except BaseException:
+            if process.returncode is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                # No process groups on Windows
+                except (ProcessLookupError, PermissionError, AttributeError):
+                    process.kill()
+                await process.wait()
+            raise
+        return (
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+
+    @staticmethod
+    @tool_async("execute_python")
+    async def aexecute_python(
+        code: str, timeout: float = 10, fresh: bool = False
+    ) -> dict[str, Any]:
+        """Execute Python code without blocking the event loop"""
+        timeout = max(1, min(float(timeout), MAX_TIMEOUT))
+        if not fresh and KERNELS_SUPPORTED:
+            try:
+                return await asyncio.to_thread(
+                    get_kernel_pool().execute, code, timeout, tool_session()
+                )
+            except asyncio.CancelledError:
+                get_kernel_pool().interrupt(tool_session())
+                raise
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "python",
+                "-c",
+                code,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+            output, error = await CodingTools._communicate(process, timeout)
+            return {"success": True, "output": output, "error": error or None}
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"Code execution timeout ({timeout:g}s)"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    @tool_async("bash_command")
+    async def abash_command(
+        command: str, timeout: float = 10, background: bool = False
+    ) -> dict[str, Any]:
+        """Execute bash command without blocking the event loop"""
+        if background:
+            return await asyncio.to_thread(
+                CodingTools.bash_command, command, timeout, True
+            )
+        try:
+            timeout = max(1, min(float(timeout), MAX_TIMEOUT))
+            session = get_shell_session(tool_session())
+            job = session.start(command, on_output=CodingTools._stream_output)
+            try:
+                finished = await asyncio.to_thread(job.wait, timeout)
+            except asyncio.CancelledError:
+                await asyncio.to_thread(job.kill)
+                session.finish(job)
+                raise
+            if not finished:
+                await asyncio.to_thread(job.kill)
+            session.finish(job)
+            result = {**job.result(), "timed_out": not finished, "cwd": session.cwd}
+            return CodingTools._command_result(result, timeout)
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
     def get_tool_definitions() -> list[dict]:
         """Get tool definitions for Groq API"""
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "read_file",
-                    "description": "Read the contents of a file",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file to read",
-                            }
-                        },
-                        "required": ["file_path"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "write_file",
-                    "description": "Write content to a file",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file to write",
-                            },
-                            "content": {
-                                "type": "string",
-                                "description": "Content to write to the file",
-                            },
-                        },
-                        "required": ["file_path", "content"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "list_files",
-                    "description": "List files in a directory",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "directory": {
-                                "type": "string",
-                                "description": "Directory path (default: current directory)",
-                            }
-                        },
-                        "required": [],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "execute_python",
-                    "description": "Execute Python code",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "code": {
-                                "type": "string",
-                                "description": "Python code to execute",
-                            }
-                        },
-                        "required": ["code"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "bash_command",
-                    "description": "Execute bash command",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "Bash command to execute",
-                            }
-                        },
-                        "required": ["command"],
-                    },
-                },
-            },
-        ]
+        return get_registry().definitions()
+
+    @staticmethod
+    def _serialize(result: Any) -> str:
+        if not isinstance(result, dict):
+            result = {"success": True, "result": result}
+        return get_spool(tool_session()).spill(result)
 
     @staticmethod
     def execute_tool(tool_name: str, tool_input: dict) -> str:
         """Execute a tool and return result as string"""
         try:
-            if tool_name == "read_file":
-                result = CodingTools.read_file(tool_input.get("file_path", ""))
-            elif tool_name == "write_file":
-                result = CodingTools.write_file(
-                    tool_input.get("file_path", ""), tool_input.get("content", "")
-                )
-            elif tool_name == "list_files":
-                result = CodingTools.list_files(tool_input.get("directory", "."))
-            elif tool_name == "execute_python":
-                result = CodingTools.execute_python(tool_input.get("code", ""))
-            elif tool_name == "bash_command":
-                result = CodingTools.bash_command(tool_input.get("command", ""))
+            return CodingTools._serialize(get_registry().call(tool_name, tool_input))
+        except Exception as e:
+            return json.dumps({"success": False, "error": str(e)})
+
+    @staticmethod
+    async def aexecute_tool(tool_name: str, tool_input: dict) -> str:
+        """Async execute_tool: subprocess tools run natively, the rest in a thread"""
+        try:
+            if get_registry().has_async(tool_name):
+                result = await get_registry().acall(tool_name, tool_input)
             else:
-                result = {"success": False, "error": f"Unknown tool: {tool_name}"}
-            return json.dumps(result)
+                return await asyncio.to_thread(
+                    CodingTools.execute_tool, tool_name, tool_input
+                )
+            return CodingTools._serialize(result)
         except Exception as e:
             return json.dumps({"success": False, "error": str(e)})
+
+
+class ToolExecutor:
+    """Runs the tool calls of one assistant turn concurrently"""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        on_timing: Optional[Callable[[str, float], None]] = None,
+        session: str = "default",
+    ):
+        self.max_workers = max(1, max_workers)
+        # Tool session the calls run in, see tool_session()
+        self.session = session
+        # Called with (tool_name, seconds) after each call, e.g. by bench
+        self.on_timing = on_timing
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _execute(self, tool_name: str, tool_input: dict) -> str:
+        start = time.perf_counter()
+        token = _tool_session.set(self.session)
+        try:
+            with get_tracer().span("tool", tool=tool_name):
+                return CodingTools.execute_tool(tool_name, tool_input)
+        finally:
+            _tool_session.reset(token)
+            if self.on_timing is not None:
+                self.on_timing(tool_name, time.perf_counter() - start)
+
+    async def _aexecute(self, tool_name: str, tool_input: dict) -> str:
+        start = time.perf_counter()
+        token = _tool_session.set(self.session)
+        try:
+            with get_tracer().span("tool", tool=tool_name):
+                return await CodingTools.aexecute_tool(tool_name, tool_input)
+        finally:
+            _tool_session.reset(token)
+            if self.on_timing is not None:
+                self.on_timing(tool_name, time.perf_counter() - start)
+
+    @staticmethod
+    def plan(calls: list[tuple[str, dict]]) -> list[list[int]]:
+        """Group call indexes into batches that may run at the same time
+
+        Consecutive read-only calls share a batch. A mutating call gets a
+        batch of its own, so it sees every earlier call finished and no later
+        call has started yet.
+        """
+        registry = get_registry()
+        batches: list[list[int]] = []
+        current: list[int] = []
+        for index, (tool_name, _) in enumerate(calls):
+            if not registry.is_read_only(tool_name):
+                if current:
+                    batches.append(current)
+                    current = []
+                batches.append([index])
+            else:
+                current.append(index)
+        if current:
+            batches.append(current)
+        return batches
+
+    def run(self, calls: list[tuple[str, dict]]) -> list[str]:
+        """Execute (tool_name, tool_input) pairs, results in call order"""
+        results: list[str] = [""] * len(calls)
+        for batch in self.plan(calls):
+            if len(batch) == 1 or self.max_workers == 1:
+                for index in batch:
+                    results[index] = self._execute(*calls[index])
+                continue
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="tool"
+                )
+            futures = {
+                # Copy the context so tool spans nest under the current span
+                index: self._pool.submit(
+                    contextvars.copy_context().run, self._execute, *calls[index]
+                )
+                for index in batch
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+        return results
+
+    async def arun(
+        self, calls: list[tuple[str, dict]], results: Optional[list] = None
+    ) -> list[str]:
+        """Async run: same batching, at most max_workers calls in flight
+
+        Results are filled into results as calls finish, so a caller that
+        is cancelled still sees which calls completed.
+        """
+        if results is None:
+            results = [None] * len(calls)
+        limit = asyncio.Semaphore(self.max_workers)
+
+        async def run_one(index: int):
+            async with limit:
+                results[index] = await self._aexecute(*calls[index])
+
+        for batch in self.plan(calls):
+            await asyncio.gather(*(run_one(index) for index in batch))
+        return results
+
+    def shutdown(self):
+        """Release the worker threads"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,196 @@
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+TRACE_FORMATS = ("jsonl", "otlp")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Span:
+    """A timed operation with attributes, nested under the current span"""
+
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.status = "ok"
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "cancelled" if exc_type.__name__ == "CancelledError" else "error"
+            self.attributes.setdefault("error", f"{exc_type.__name__}: {exc}")
+        self.tracer.finish(self)
+        return False
+
+
+class NoopSpan:
+    """Stand-in span used while tracing is off"""
+
+    recording = False
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class NoopTracer:
+    """Tracer that records nothing; span() costs one call"""
+
+    enabled = False
+
+    def span(self, name: str, **attributes) -> NoopSpan:
+        return NOOP_SPAN
+
+    def close(self):
+        pass
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """Writes finished spans to a file as JSON lines
+
+    "jsonl" writes one span per line. "otlp" writes one OTLP/JSON
+    ExportTraceServiceRequest per finished trace, the layout of the
+    OpenTelemetry collector's file exporter.
+    """
+
+    enabled = True
+
+    def __init__(self, path: str, fmt: str = "jsonl", service: str = "groq-cli-agent"):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {fmt}")
+        self.format = fmt
+        self.service = service
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending: list[Span] = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes) -> Span:
+        return Span(self, name, attributes)
+
+    def finish(self, span: Span):
+        with self._lock:
+            if self._file.closed:
+                return
+            if self.format == "jsonl":
+                self._file.write(json.dumps(self._jsonl(span), default=str) + "\n")
+                self._file.flush()
+                return
+            self._pending.append(span)
+            if span.parent is None:
+                self._flush_otlp()
+
+    def _jsonl(self, span: Span) -> dict[str, Any]:
+        return {
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent.span_id if span.parent else None,
+            "start": span.start_ns / 1e9,
+            "duration_ms": round((span.end_ns - span.start_ns) / 1e6, 3),
+            "status": span.status,
+            "attributes": span.attributes,
+        }
+
+    def _flush_otlp(self):
+        if not self._pending:
+            return
+        spans = [
+            {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent.span_id if span.parent else "",
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in span.attributes.items()
+                ],
+                # 1 = OK, 2 = ERROR
+                "status": {"code": 1} if span.status == "ok" else {"code": 2, "message": span.status},
+            }
+            for span in self._pending
+        ]
+        self._pending = []
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self.service}}
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "groq-agent"}, "spans": spans}],
+                }
+            ]
+        }
+        self._file.write(json.dumps(request) + "\n")
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            if self.format == "otlp":
+                self._flush_otlp()
+            self._file.close()
+
+
+_tracer: Any = NoopTracer()
+
+
+def get_tracer():
+    """Tracer of the current process, a no-op unless configured"""
+    return _tracer
+
+
+def configure_tracing(path: Optional[str], fmt: str = "jsonl"):
+    """Send spans to path, or turn tracing off when path is None"""
+    global _tracer
+    _tracer.close()
+    _tracer = Tracer(path, fmt) if path else NoopTracer()
+    atexit.register(_tracer.close)
@@ -0,0 +1,216 @@
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Directories never worth descending into, ignore files or not
+ALWAYS_PRUNE = {
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+}
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob to a regex fragment"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            out.append("[^/]*")
+        elif char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Rules of one .gitignore file
+
+    Paths handed to match() are relative to the walk root. `prefix` maps
+    them into the ignore file's directory when it sits above the root,
+    `strip` when it sits below.
+    """
+
+    def __init__(self, lines: list[str], prefix: str = "", strip: str = ""):
+        self.prefix = prefix
+        self.strip = strip
+        self.rules: list[tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            body = _glob_to_regex(line)
+            regex = f"^{body}$" if anchored else f"(?:^|/){body}$"
+            self.rules.append((re.compile(regex), negate, dir_only))
+
+    @classmethod
+    def load(cls, path: Path, prefix: str = "", strip: str = "") -> Optional["IgnoreRules"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                rules = cls(f.readlines(), prefix, strip)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included, None if no rule applies"""
+        path = self.prefix + rel_path[len(self.strip) :]
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.search(path):
+                result = not negate
+        return result
+
+
+def _ancestor_rules(root: Path) -> list[IgnoreRules]:
+    """Ignore rules from .gitignore files between the repo root and root"""
+    rules = []
+    current = root.resolve()
+    parts: list[str] = []
+    while not (current / ".git").exists():
+        if current.parent == current:
+            return []
+        parts.insert(0, current.name)
+        current = current.parent
+        loaded = IgnoreRules.load(current / ".gitignore", "/".join(parts) + "/")
+        if loaded:
+            rules.insert(0, loaded)
+    return rules
+
+
+def _is_ignored(rules: list[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    # The deepest ignore file with a matching rule decides
+    for rule_set in reversed(rules):
+        result = rule_set.match(rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def walk(
+    root: str = ".",
+    max_depth: Optional[int] = None,
+    include_hidden: bool = False,
+    after: Optional[str] = None,
+) -> Iterator[tuple[str, os.DirEntry, bool]]:
+    """Yield (relative path, entry, is_dir) in sorted depth-first order
+
+    Ignored directories are pruned before they are opened. Entries at or
+    before the relative path `after` are skipped without walking the
+    subtrees that precede it, which makes resuming a listing cheap.
+    """
+    root_path = Path(root)
+    after_parts = tuple(after.split("/")) if after else None
+
+    def scan(directory: str, parts: tuple, depth: int, rules: list):
+        local = IgnoreRules.load(
+            Path(directory) / ".gitignore", strip="/".join(parts) + "/" if parts else ""
+        )
+        if local:
+            rules = rules + [local]
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            name = entry.name
+            if not include_hidden and name.startswith("."):
+                continue
+            entry_parts = parts + (name,)
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir and name in ALWAYS_PRUNE:
+                continue
+            rel = "/".join(entry_parts)
+            if rules and _is_ignored(rules, rel, is_dir):
+                continue
+            emit = True
+            if after_parts is not None:
+                if entry_parts == after_parts[: len(entry_parts)]:
+                    emit = False
+                elif entry_parts < after_parts:
+                    continue
+            if emit:
+                yield rel, entry, is_dir
+            if is_dir and (max_depth is None or depth < max_depth):
+                yield from scan(entry.path, entry_parts, depth + 1, rules)
+
+    yield from scan(str(root_path), (), 1, _ancestor_rules(root_path))
+
+
+def list_page(
+    root: str = ".",
+    pattern: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> dict:
+    """One page of a directory listing as compact [path, type, size] rows"""
+    entries = []
+    next_cursor = None
+    for rel, entry, is_dir in walk(root, max_depth=max_depth, after=cursor):
+        if pattern:
+            target = rel if "/" in pattern else entry.name
+            if is_dir or not fnmatch.fnmatch(target, pattern):
+                continue
+        if len(entries) == limit:
+            next_cursor = entries[-1][0].rstrip("/")
+            break
+        if is_dir:
+            entries.append([rel + "/", "d", None])
+        else:
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                size = None
+            entries.append([rel, "l" if entry.is_symlink() else "f", size])
+    return {"entries": entries, "next_cursor": next_cursor}